@@ -0,0 +1,129 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ActionLogWriter:
+    """Writes action log entries from a background thread.
+
+    ``write()`` only puts the entry on a queue. The writer thread keeps the file open and
+    flushes once ``flush_bytes`` are buffered or ``flush_interval`` seconds have passed.
+    When the file grows past ``max_bytes`` it is gzip-compressed to ``<path>.1.gz`` (older
+    archives shift up to ``<path>.<backup_count>.gz``) and a new file is started.
+
+    With ``fmt="text"`` entries are written as the classic one-line sentence, with
+    ``fmt="jsonl"`` as one JSON object per line that ``iter_records()`` can read back.
+    """
+
+    def __init__(self, path, fmt="text", flush_bytes=64 * 1024, flush_interval=1.0,
+                 max_bytes=50 * 1024 * 1024, backup_count=5):
+        if fmt not in ("text", "jsonl"):
+            raise ValueError(f"Unknown action log format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._file = None
+        self._buffer = []
+        self._buffered = 0
+        self.written = 0
+        self.rotations = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="action-log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, ip, uid, container_id):
+        self._queue.put((time.time(), ip, uid, container_id))
+
+    def close(self):
+        """Flush everything that was written so far and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _format(self, ts, ip, uid, container_id):
+        if self.fmt == "jsonl":
+            return json.dumps({"ts": round(ts, 3), "ip": ip, "uid": uid, "container_id": container_id},
+                              separators=(",", ":")) + "\n"
+        return f"Action completed after successful request to {ip}:{container_id} with UID {uid}!\n"
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(self.flush_interval - (time.monotonic() - last_flush), 0)
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = None
+
+            if entry is _STOP:
+                self._flush()
+                if self._file is not None:
+                    self._file.close()
+                return
+            if entry is not None:
+                line = self._format(*entry)
+                self._buffer.append(line)
+                self._buffered += len(line)
+
+            if self._buffered >= self.flush_bytes or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush()
+                last_flush = time.monotonic()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", buffering=1024 * 1024)
+            self._file.write("".join(self._buffer))
+            self._file.flush()
+            self.written += len(self._buffer)
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            logger.error("Failed to write action log %s: %s", self.path, e)
+        self._buffer = []
+        self._buffered = 0
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for index in range(self.backup_count - 1, 0, -1):
+            older = f"{self.path}.{index}.gz"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}.gz")
+        with open(self.path, "rb") as src, gzip.open(f"{self.path}.1.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(self.path)
+        self.rotations += 1
+
+
+def iter_records(path):
+    """Yield the entries of a JSONL action log, oldest archive first, then the live file."""
+    archives = sorted(glob.glob(f"{glob.escape(path)}.*.gz"),
+                      key=lambda name: int(name[len(path) + 1:-3]), reverse=True)
+    for archive in archives:
+        with gzip.open(archive, "rt") as f:
+            for line in f:
+                yield json.loads(line)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                yield json.loads(line)
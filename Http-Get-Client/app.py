@@ -1,46 +1,60 @@
-import time
-import requests
+import asyncio
+import glob
 import os
 import logging
+import random
+import time
+
+import aiohttp
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,  # Set to DEBUG to capture all levels of log messages
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Output to console
-        # Uncomment the next line to also log to a file
-        # logging.FileHandler("/var/log/application.log"),
-    ]
-)
+import metrics
+import profiler
+from action_log import ActionLogWriter
+from completions import CompletionCache
+from logconfig import setup_logging
+from pool import ConnectionPool
+from prober import probe_host
+from reporter import Reporter
+from roster import Roster
+from scheduler import ProbeScheduler, backoff_delay
+from sharding import Coordinator
+
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_PER_SECOND; see logconfig.py)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
 # Configuration
-USER_IP_FILE = "/users_ip.txt"  # User's IP file in the root of the container
-PORT_FILE = "/port.txt"  # Port number file in the root of the container
-CONTAIERID_FILE ="/containerid.txt"
+USER_IP_FILE = os.environ.get("USER_IP_FILE", "/users_ip.txt")  # User's IP file in the root of the container
+PORT_FILE = os.environ.get("PORT_FILE", "/port.txt")  # Port number file in the root of the container
+CONTAIERID_FILE = os.environ.get("CONTAINERID_FILE", "/containerid.txt")
 CHECK_INTERVAL = 5  # Interval between GET requests, in seconds
-
-# Global Variables
-users_ip = []
-users_uid = []
-
-
-def is_valid_ip(ip):
-    """Simple IP address validation."""
-    parts = ip.split(".")
-    if len(parts) != 4:
-        logger.debug(f"IP '{ip}' does not have 4 parts.")
-        return False
-    try:
-        valid = all(0 <= int(part) <= 255 for part in parts)
-        if not valid:
-            logger.debug(f"IP '{ip}' has parts outside the valid range (0-255).")
-        return valid
-    except ValueError:
-        logger.debug(f"IP '{ip}' contains non-integer parts.")
-        return False
+FAST_RECHECK_INTERVAL = float(os.environ.get("FAST_RECHECK_INTERVAL", 1))  # Re-probe hosts that just changed state
+MAX_BACKOFF = float(os.environ.get("MAX_BACKOFF", 300))  # Longest delay between probes of an unreachable host
+STATS_INTERVAL = float(os.environ.get("STATS_INTERVAL", 60))  # Interval between scheduler/pool stats log lines
+REPORT_QUEUE_SIZE = int(os.environ.get("REPORT_QUEUE_SIZE", 1000))  # Successes waiting to be reported
+REPORT_BATCH_SIZE = int(os.environ.get("REPORT_BATCH_SIZE", 50))  # Reports sent to the evaluation API at once
+REPORT_FLUSH_INTERVAL = float(os.environ.get("REPORT_FLUSH_INTERVAL", 0.5))  # Longest wait to fill a batch
+REPORT_MAX_RETRIES = int(os.environ.get("REPORT_MAX_RETRIES", 3))  # Retries of a rejected or failed report
+PROBE_TIMEOUT = float(os.environ.get("PROBE_TIMEOUT", 10))  # Deadline for a single probe, in seconds
+MAX_CONCURRENT_PROBES = int(os.environ.get("MAX_CONCURRENT_PROBES", 100))  # Probes in flight at once
+POOL_LIMIT_PER_HOST = int(os.environ.get("POOL_LIMIT_PER_HOST", 10))  # Connections kept to any one host
+POOL_KEEPALIVE_TIMEOUT = float(os.environ.get("POOL_KEEPALIVE_TIMEOUT", 30))  # Idle connections closed after this
+COMPLETION_CACHE_FILE = os.environ.get("COMPLETION_CACHE_FILE", "/completions.json")  # Students already reported
+COMPLETION_TTL = float(os.environ.get("COMPLETION_TTL", 24 * 3600))  # Report a passed student again after this
+COMPLETED_RECHECK_INTERVAL = float(os.environ.get("COMPLETED_RECHECK_INTERVAL", 300))  # Probe passed students this often
+SHARDS = int(os.environ.get("SHARDS", 1))  # Worker processes splitting the roster, 1 probes in-process
+ACTION_LOG_FILE = os.environ.get("ACTION_LOG_FILE", "/action_log.txt")
+ACTION_LOG_FORMAT = os.environ.get("ACTION_LOG_FORMAT", "text")  # "text" or "jsonl"
+ACTION_LOG_MAX_BYTES = int(os.environ.get("ACTION_LOG_MAX_BYTES", 50 * 1024 * 1024))  # Rotate and gzip past this size
+
+# Probe outcomes and latency, served at :METRICS_PORT/metrics (see metrics.py)
+PROBES = metrics.REGISTRY.counter("probes_total", "Probes of student hosts, by result", ("result",))
+PROBE_SUCCESSES = PROBES.labels("success")
+PROBE_FAILURES = PROBES.labels("failure")
+PROBE_SECONDS = metrics.REGISTRY.histogram("probe_duration_seconds", "Time taken by a probe, whatever its result").labels()
+
+action_log = ActionLogWriter(ACTION_LOG_FILE, fmt=ACTION_LOG_FORMAT, max_bytes=ACTION_LOG_MAX_BYTES)
 
 
 def get_container_id():
@@ -48,151 +62,181 @@ def get_container_id():
     try:
         with open(CONTAIERID_FILE, "r") as f:
             containerID_content = f.read().strip()
-            logger.debug(f"Containerid file content: '{containerID_content}'")
-            logger.info(f"id  retrieved: {containerID_content}")
+            logger.debug("Containerid file content: '%s'", containerID_content)
+            logger.info("id  retrieved: %s", containerID_content)
             return containerID_content
 
     except FileNotFoundError:
-        logger.error(f"Error: {CONTAIERID_FILE} not found.")
+        logger.error("Error: %s not found.", CONTAIERID_FILE)
         return None
     except Exception as e:
-        logger.error(f"Unexpected error while reading {CONTAIERID_FILE}: {e}")
+        logger.error("Unexpected error while reading %s: %s", CONTAIERID_FILE, e)
         return None
 
 
-def get_user_ips():
-    """Read the user's IPs and UIDs from the file."""
-    global users_ip, users_uid
-    users_ip = []
-    users_uid = []
-    logger.debug("Attempting to read user IPs and UIDs from file.")
-
-    try:
-        with open(USER_IP_FILE, "r") as f:
-            lines = f.read().splitlines()  # Handles different newline characters
-            logger.debug(f"Total lines read from {USER_IP_FILE}: {len(lines)}")
-
-            if not lines:
-                logger.info("User IP file is empty.")
-                return
-
-            for line_number, line in enumerate(lines, start=1):
-                original_line = line  # Keep the original line for logging
-                line = line.strip()
-                logger.debug(f"Processing line {line_number}: '{original_line}'")
-
-                if not line:
-                    logger.warning(f"Line {line_number} is empty. Skipping.")
-                    continue  # Skip empty lines
-
-                parts = line.split(",")
-                logger.debug(f"Line {line_number} split into parts: {parts}")
-
-                # if len(parts) != 2:
-                #     logger.error(f"Malformed line {line_number} skipped: '{original_line}'")
-                #     continue  # Skip malformed lines
-
-                ip, uid = parts
-                ip = ip.strip()
-                uid = uid.strip()
-                logger.debug(f"Line {line_number} parsed IP: '{ip}', UID: '{uid}'")
-
-                # Validate IP
-                if not is_valid_ip(ip):
-                    logger.error(f"Invalid IP format on line {line_number}: '{ip}'. Skipping.")
-                    continue
-                #
-                # # Validate UID
-                # if not uid:
-                #     logger.error(f"Empty UID on line {line_number}. Skipping.")
-                #     continue
-
-                users_ip.append(ip)
-                users_uid.append(uid)
-                logger.info(f"Line {line_number}: Added IP '{ip}' and UID '{uid}' to lists.")
-
-        logger.debug(f"Total valid entries retrieved: {len(users_ip)}")
-        logger.debug(f"User IPs: {users_ip}")
-        logger.debug(f"User UIDs: {users_uid}")
-
-    except FileNotFoundError:
-        logger.error(f"Error: {USER_IP_FILE} not found.")
-    except Exception as e:
-        logger.error(f"Unexpected error while reading {USER_IP_FILE}: {e}")
-
-
 def get_port():
     """Read the port number from the port file."""
     try:
         with open(PORT_FILE, "r") as f:
             port_content = f.read().strip()
-            logger.debug(f"Port file content: '{port_content}'")
+            logger.debug("Port file content: '%s'", port_content)
             if port_content.isdigit():
                 port = int(port_content)
-                logger.info(f"Port retrieved: {port}")
+                logger.info("Port retrieved: %s", port)
                 return port
             else:
-                logger.error(f"Invalid port number in {PORT_FILE}: '{port_content}'")
+                logger.error("Invalid port number in %s: '%s'", PORT_FILE, port_content)
                 return None
     except FileNotFoundError:
-        logger.error(f"Error: {PORT_FILE} not found.")
+        logger.error("Error: %s not found.", PORT_FILE)
         return None
     except Exception as e:
-        logger.error(f"Unexpected error while reading {PORT_FILE}: {e}")
+        logger.error("Unexpected error while reading %s: %s", PORT_FILE, e)
         return None
 
 
+def completion_cache_files():
+    """COMPLETION_CACHE_FILE and every per-shard file next to it, whatever shard count wrote them."""
+    shard_files = glob.glob(f"{glob.escape(COMPLETION_CACHE_FILE)}.*")
+    return [COMPLETION_CACHE_FILE] + sorted(path for path in shard_files if path.rsplit(".", 1)[1].isdigit())
+
+
 def on_successful_request(ip, uid, container_id):
     """Action to perform when the request is successful."""
-    logger.info(f"Request to {ip}:{container_id} sent successfully! Performing an action...")
-    try:
-        with open("/action_log.txt", "a") as log_file:
-            log_entry = f"Action completed after successful request to {ip}:{container_id} with UID {uid}!\n"
-            log_file.write(log_entry)
-            logger.debug(f"Action logged in /action_log.txt: '{log_entry.strip()}'")
+    logger.info("Request to %s:%s sent successfully! Performing an action...", ip, container_id)
+    action_log.write(ip, uid, container_id)
 
-        # Send API request to the server informing it that the action was completed
-        api_url = f"http://0.0.0.0:3000/api/ClientEvaluation/1/{container_id}/{ip}"
 
-        logger.debug(f"Sending GET request to API URL: {api_url} ")
-        response = requests.get(api_url)
-        logger.info(f"Server informed: {response.status_code} - {response.text}")
-    except Exception as e:
-        logger.error(f"Failed to log action or notify server: {e}")
+async def notify_server(session, ip, container_id):
+    """Inform the evaluation server that the action was completed. Returns True if it accepted."""
+    api_url = f"http://0.0.0.0:3000/api/ClientEvaluation/1/{container_id}/{ip}"
+
+    logger.debug("Sending GET request to API URL: %s ", api_url)
+    async with session.get(api_url, timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT)) as response:
+        text = await response.text()
+        logger.info("Server informed: %s - %s", response.status, text)
+        return response.status < 400
 
 
 def main():
     """Main loop to keep trying GET requests to all user IPs."""
     container_id = get_container_id()
 
-    logger.info(f"Container ID: {container_id}")
-
-    while True:
-        get_user_ips()
-        port = get_port()
-
-        if not users_ip:
-            logger.warning("No valid IPs found. Retrying...")
-        elif port is None:
-            logger.warning("Port number is invalid or not found. Retrying...")
-        else:
-            logger.debug(f"Starting to send GET requests to {len(users_ip)} IPs.")
-            for ip, uid in zip(users_ip, users_uid):
-                target_url = f"http://{ip}:{port}"
-                logger.info(f"Sending GET request to {target_url}...")
-                try:
-                    response = requests.get(target_url, timeout=10)  # Added timeout for better handling
-                    logger.debug(f"Received response: {response.status_code} - {response.text}")
-                    if response.status_code == 200:
-                        logger.info(f"Success: {response.text}")
-                        on_successful_request(ip, uid, container_id)
+    logger.info("Container ID: %s", container_id)
+
+    # Profiles cover this process only; a shard worker is profiled with SIGUSR2 to its pid
+    profile_routes = {"/debug/profile": profiler.admin_route}
+    profiler.install_signal_handler()
+    if SHARDS > 1:
+        coordinator = Coordinator(container_id, SHARDS, USER_IP_FILE, get_port, action_log,
+                                  CHECK_INTERVAL, STATS_INTERVAL)
+        metrics.serve(coordinator.collect_metrics, routes=profile_routes)
+        coordinator.run()
+    else:
+        metrics.serve(routes=profile_routes)
+        asyncio.run(run(container_id))
+
+
+async def run(container_id, link=None):
+    """Probe every user IP on its own schedule, reloading the roster every CHECK_INTERVAL seconds.
+
+    In a shard worker ``link`` is the sharding.WorkerLink to the coordinator, which supplies
+    the roster and port and receives the stats and metrics.
+    """
+    pool = ConnectionPool(limit=MAX_CONCURRENT_PROBES + POOL_LIMIT_PER_HOST,
+                          limit_per_host=POOL_LIMIT_PER_HOST,
+                          keepalive_timeout=POOL_KEEPALIVE_TIMEOUT)
+
+    if link is None:
+        roster = Roster(USER_IP_FILE)
+        completed = CompletionCache(COMPLETION_CACHE_FILE, ttl=COMPLETION_TTL)
+    else:
+        roster = link.roster
+        completed = CompletionCache(f"{COMPLETION_CACHE_FILE}.{link.index}", ttl=COMPLETION_TTL)
+    # The ring may have moved students since another shard count reported them: read every file
+    completed.load(completion_cache_files())
+    port = None
+
+    async def send_report(item):
+        ip, uid = item
+        return await notify_server(pool.session, ip, container_id)
+
+    reporter = Reporter(send_report, completed.add,
+                        max_queue=REPORT_QUEUE_SIZE, batch_size=REPORT_BATCH_SIZE,
+                        flush_interval=REPORT_FLUSH_INTERVAL, max_retries=REPORT_MAX_RETRIES)
+
+    async def probe(uid):
+        """Probe one host and return the delay until its next probe."""
+        host = roster.hosts.get(uid)
+        if host is None:
+            return None
+        if port is None:
+            return CHECK_INTERVAL
+
+        started = time.perf_counter()
+        ok = await probe_host(pool.session, host.ip, port, PROBE_TIMEOUT)
+        PROBE_SECONDS.observe(time.perf_counter() - started)
+        (PROBE_SUCCESSES if ok else PROBE_FAILURES).inc()
+        changed = host.ok is not None and ok != host.ok
+        host.ok = ok
+        host.checked_at = time.monotonic()
+
+        if not ok:
+            host.failures += 1
+            return FAST_RECHECK_INTERVAL if changed else backoff_delay(host.failures, CHECK_INTERVAL, MAX_BACKOFF)
+
+        host.failures = 0
+        key = CompletionCache.key(host.ip, host.uid, container_id)
+        if key in completed:
+            logger.debug("%s with UID %s already reported, skipping notification.", host.ip, host.uid)
+            # Students that already passed only need an occasional re-check
+            return COMPLETED_RECHECK_INTERVAL
+        if await reporter.submit(key, (host.ip, host.uid)):
+            on_successful_request(host.ip, host.uid, container_id)
+        return CHECK_INTERVAL
+
+    scheduler = ProbeScheduler(probe, MAX_CONCURRENT_PROBES, error_delay=CHECK_INTERVAL)
+
+    action_log.start()
+    async with pool:
+        scheduler_task = asyncio.create_task(scheduler.run())
+        reporter_task = asyncio.create_task(reporter.run())
+        last_stats = time.monotonic()
+        try:
+            while True:
+                if link is None:
+                    diff = roster.refresh()
+                    port = get_port()
+                    if not roster.hosts:
+                        logger.warning("No valid IPs found. Retrying...")
+                    elif port is None:
+                        logger.warning("Port number is invalid or not found. Retrying...")
+                else:
+                    diff, port = link.poll()
+                    link.publish_metrics(metrics.REGISTRY.collect())
+
+                if diff is not None:
+                    added, removed, changed = diff
+                    for uid in removed:
+                        scheduler.remove(uid)
+                    # Spread new hosts over one interval instead of probing them all at once
+                    for uid in added + changed:
+                        scheduler.schedule(uid, random.uniform(0, CHECK_INTERVAL))
+
+                completed.save()
+                if time.monotonic() - last_stats >= STATS_INTERVAL:
+                    stats = {"scheduler": scheduler.stats(), "reporter": reporter.stats(), "pool": pool.stats()}
+                    if link is None:
+                        logger.info("Probe stats: %s", stats)
                     else:
-                        logger.error(f"Failed with status code: {response.status_code} for {ip}:{port}")
-                except requests.exceptions.RequestException as e:
-                    logger.error(f"Error sending request to {ip}:{port} - {e}")
-
-        logger.debug(f"Sleeping for {CHECK_INTERVAL} seconds before next check.")
-        time.sleep(CHECK_INTERVAL)
+                        link.publish(stats)
+                    last_stats = time.monotonic()
+
+                await asyncio.sleep(CHECK_INTERVAL)
+        finally:
+            scheduler_task.cancel()
+            reporter_task.cancel()
+            action_log.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionCache:
+    """Persistent record of the students that already passed and were reported.
+
+    Entries expire ``ttl`` seconds after they were recorded, so a student is reported again
+    at most once per TTL. When more than ``max_entries`` are held the oldest are evicted.
+    The cache is kept in memory and written to ``path`` as JSON by ``save()``.
+    """
+
+    def __init__(self, path, ttl=24 * 3600, max_entries=100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> completion time, oldest first
+        self._dirty = False
+
+    @staticmethod
+    def key(ip, uid, container_id):
+        return f"{container_id}/{uid}/{ip}"
+
+    def load(self, paths=None):
+        """Read the cache from ``paths`` (default: its own file), dropping entries that already
+        expired. A key found in several files keeps its newest completion time.
+        """
+        now = time.time()
+        merged = {}
+        for path in paths or [self.path]:
+            try:
+                with open(path, "r") as f:
+                    stored = json.load(f)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.error("Unexpected error while reading %s: %s", path, e)
+                continue
+            for key, completed_at in stored.items():
+                if now - completed_at < self.ttl and completed_at > merged.get(key, 0):
+                    merged[key] = completed_at
+
+        for key, completed_at in sorted(merged.items(), key=lambda item: item[1]):
+            self._entries[key] = completed_at
+        self._evict()
+        logger.info("Loaded %s completed students from %s", len(self._entries), ", ".join(paths or [self.path]))
+
+    def save(self):
+        """Write the cache to disk if it changed since the last save."""
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.error("Failed to save completion cache to %s: %s", self.path, e)
+
+    def __contains__(self, key):
+        completed_at = self._entries.get(key)
+        if completed_at is None:
+            return False
+        if time.time() - completed_at >= self.ttl:
+            del self._entries[key]
+            self._dirty = True
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key):
+        self._entries.pop(key, None)
+        self._entries[key] = time.time()
+        self._dirty = True
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
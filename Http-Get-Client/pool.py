@@ -0,0 +1,63 @@
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """One keep-alive aiohttp session shared by the student probes and the evaluation API.
+
+    ``limit`` caps the total number of open connections and ``limit_per_host`` the number of
+    connections to any single host. Idle connections are closed after ``keepalive_timeout``
+    seconds. The pool counts how many requests found an idle connection to reuse.
+    """
+
+    def __init__(self, limit=100, limit_per_host=10, keepalive_timeout=30):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    async def __aenter__(self):
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    async def _on_request_start(self, session, ctx, params):
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session, ctx, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, ctx, params):
+        self.connections_reused += 1
+
+    @property
+    def reuse_ratio(self):
+        """Fraction of connection acquisitions that reused an idle keep-alive connection."""
+        acquired = self.connections_created + self.connections_reused
+        return self.connections_reused / acquired if acquired else 0.0
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.reuse_ratio, 3),
+        }
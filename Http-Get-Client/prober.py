@@ -0,0 +1,30 @@
+import asyncio
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+async def probe_host(session, ip, port, deadline):
+    """Send one GET request to a student host and report whether it answered 200.
+
+    The whole request (connect, send, read body) must finish within ``deadline`` seconds.
+    """
+    target_url = f"http://{ip}:{port}"
+    logger.info("Sending GET request to %s...", target_url)
+    try:
+        timeout = aiohttp.ClientTimeout(total=deadline)
+        async with session.get(target_url, timeout=timeout) as response:
+            text = await response.text()
+            logger.debug("Received response: %s - %s", response.status, text)
+            if response.status == 200:
+                logger.info("Success: %s", text)
+                return True
+            logger.error("Failed with status code: %s for %s:%s", response.status, ip, port)
+    except asyncio.TimeoutError:
+        logger.error("Timed out after %ss sending request to %s:%s", deadline, ip, port)
+    except aiohttp.ClientError as e:
+        logger.error("Error sending request to %s:%s - %s", ip, port, e)
+    return False
+
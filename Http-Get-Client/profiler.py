@@ -0,0 +1,183 @@
+import collections
+import glob
+import hmac
+import json
+import logging
+import math
+import os
+import signal
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SECONDS = float(os.environ.get("PROFILE_SECONDS", 30))  # Length of a profile started by the signal
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", 300))  # Longest profile the endpoint starts
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 10))  # Time between stack samples
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "/tmp/profiles")  # Where the .folded files are written
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 5))  # Profiles kept per process; older ones are removed
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")  # X-Profile-Token for /debug/profile; empty disables it
+
+
+class Profiler:
+    """Wall-clock sampling profiler writing folded stacks (flamegraph.pl, speedscope).
+
+    While a profile runs, a background thread samples the stack of every other thread each
+    ``interval`` seconds; threads that are blocked show up in the frame they wait in. The
+    result is one ``thread;outer;...;inner count`` line per distinct stack. Nothing runs and
+    nothing is hooked while no profile is running. Only the newest ``keep`` profiles of this
+    process are kept in ``directory``.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL_MS / 1000, directory=PROFILE_DIR, keep=PROFILE_KEEP):
+        self.interval = interval
+        self.directory = directory
+        self.keep = max(keep, 1)
+        self.last_path = None  # The most recent finished profile
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, seconds):
+        """Profile for ``seconds`` in the background. Returns False if a profile is already running."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(target=self._run, args=(seconds,), name="profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, seconds):
+        try:
+            samples = self._sample(seconds)
+            self.last_path = self._write(samples)
+            self._prune()
+            logger.info("Wrote a %ss profile of %s samples to %s", seconds, sum(samples.values()), self.last_path)
+        except Exception:
+            logger.exception("Profiling failed")
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def _sample(self, seconds):
+        samples = collections.Counter()  # (thread name, code objects from the outermost) -> count
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                samples[(names.get(ident, str(ident)), tuple(stack))] += 1
+            time.sleep(self.interval)
+        return samples
+
+    def _write(self, samples):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        labels = {}
+        with open(f"{path}.tmp", "w") as f:
+            for (thread, stack), count in samples.most_common():
+                frames = [thread.replace(";", ":")]
+                for code in stack:
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = (f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                                                f"{code.co_firstlineno})").replace(";", ":")
+                    frames.append(label)
+                f.write(f"{';'.join(frames)} {count}\n")
+        os.replace(f"{path}.tmp", path)
+        return path
+
+    def _prune(self):
+        """Remove all but the newest ``keep`` profiles of this process."""
+        profiles = []
+        for path in glob.glob(os.path.join(self.directory, f"profile-{os.getpid()}-*.folded")):
+            try:
+                profiles.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+        profiles.sort(reverse=True)
+        for _, path in profiles[self.keep:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+PROFILER = Profiler()
+
+
+def install_signal_handler(signum=signal.SIGUSR2, seconds=PROFILE_SECONDS):
+    """Start a ``seconds`` profile whenever the process receives ``signum``. Call from the main thread."""
+    def handler(signum, frame):
+        if not PROFILER.start(seconds):
+            logger.warning("A profile is already running")
+
+    signal.signal(signum, handler)
+
+
+def latest_profile(directory=PROFILE_DIR, pid=None):
+    """Path of the newest profile in ``directory``, of any process or only of ``pid``; or None."""
+    newest = None
+    for path in glob.glob(os.path.join(directory, f"profile-{pid or '*'}-*.folded")):
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            continue
+        if newest is None or mtime > newest[0]:
+            newest = (mtime, path)
+    return newest and newest[1]
+
+
+def admin(method, seconds, token, pid=None):
+    """The /debug/profile endpoint. Returns (status, content type, body).
+
+    POST starts a profile of ``seconds`` (PROFILE_SECONDS if None) in this process. GET
+    returns the newest finished one in PROFILE_DIR as folded stacks; the directory is
+    shared by gunicorn's workers, so it need not be this process's. ``pid`` picks the
+    newest of one process instead. Both need ``token`` to match PROFILE_TOKEN.
+    """
+    if not PROFILE_TOKEN:
+        return 404, "text/plain", b"Profiling endpoint disabled; set PROFILE_TOKEN\n"
+    if token is None or not hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+        return 403, "text/plain", b"Wrong or missing X-Profile-Token\n"
+
+    if method == "POST":
+        try:
+            seconds = float(seconds) if seconds else PROFILE_SECONDS
+        except ValueError:
+            seconds = math.nan
+        if not (math.isfinite(seconds) and seconds > 0):
+            return 400, "text/plain", b"seconds must be a positive number\n"
+        seconds = min(seconds, PROFILE_MAX_SECONDS)
+        if not PROFILER.start(seconds):
+            return 409, "text/plain", b"A profile is already running\n"
+        body = {"seconds": seconds, "interval_ms": PROFILER.interval * 1000, "pid": os.getpid()}
+        return 202, "application/json", (json.dumps(body) + "\n").encode()
+
+    if pid is not None and not pid.isdigit():
+        return 400, "text/plain", b"pid must be a process id\n"
+    path = latest_profile(PROFILER.directory, pid)
+    if path is not None:
+        try:
+            with open(path, "rb") as f:
+                return 200, "text/plain", f.read()
+        except FileNotFoundError:
+            pass  # Removed since it was found
+    return 404, "text/plain", b"No profile yet; POST to start one\n"
+
+
+def admin_route(method, query, headers):
+    """``admin()`` as a metrics.serve() route."""
+    return admin(method, query.get("seconds", [None])[0], headers.get("X-Profile-Token"),
+                 query.get("pid", [None])[0])
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Reporter:
+    """Reports successes to the evaluation API from a background flusher.
+
+    ``submit()`` puts a success on a bounded queue and returns as soon as there is room, so
+    probes never wait on the evaluation server; when the queue is full it waits, which slows
+    the probes down instead of buffering without limit. A key that is already queued or
+    being sent is ignored.
+
+    ``run()`` takes up to ``batch_size`` queued successes (waiting at most
+    ``flush_interval`` seconds to fill a batch) and sends them concurrently with ``send``,
+    an async callable returning True when the server accepted the report. Failed sends are
+    retried with exponential backoff up to ``max_retries`` times. Up to ``max_batches``
+    batches are in flight at once, so one batch waiting on retries does not hold up the
+    next. ``on_reported`` is called with the key of every accepted report.
+    """
+
+    def __init__(self, send, on_reported, max_queue=1000, batch_size=50, flush_interval=0.5,
+                 max_retries=3, retry_delay=1, max_batches=4):
+        self._send = send
+        self._on_reported = on_reported
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._pending = set()
+        self._batch_slots = asyncio.Semaphore(max_batches)
+        self._tasks = set()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.batches = 0
+        self.sent = 0
+        self.retries = 0
+        self.failed = 0
+        self.duplicates = 0
+
+    async def submit(self, key, item):
+        """Queue ``item`` for reporting unless ``key`` is already pending. Returns True if queued."""
+        if key in self._pending:
+            self.duplicates += 1
+            return False
+        self._pending.add(key)
+        await self._queue.put((key, item))
+        return True
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            await self._batch_slots.acquire()
+            self.batches += 1
+            task = asyncio.create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch):
+        try:
+            await asyncio.gather(*(self._send_one(key, item) for key, item in batch))
+        finally:
+            self._batch_slots.release()
+
+    async def _send_one(self, key, item):
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self.retries += 1
+                    await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+                try:
+                    ok = await self._send(item)
+                except Exception as e:
+                    logger.error("Failed to report %s: %s", key, e)
+                    ok = False
+                if ok:
+                    self.sent += 1
+                    self._on_reported(key)
+                    return
+            self.failed += 1
+            logger.error("Giving up reporting %s after %s attempts.", key, self.max_retries + 1)
+        finally:
+            self._pending.discard(key)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "sent": self.sent,
+            "retries": self.retries,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+        }
@@ -0,0 +1,122 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def is_valid_ip(ip):
+    """Simple IP address validation."""
+    parts = ip.split(".")
+    if len(parts) != 4:
+        return False
+    try:
+        return all(0 <= int(part) <= 255 for part in parts)
+    except ValueError:
+        return False
+
+
+class Host:
+    """One student host from the roster, plus the probe result kept across reloads."""
+
+    __slots__ = ("uid", "ip", "ok", "checked_at", "failures")
+
+    def __init__(self, uid, ip):
+        self.uid = uid
+        self.ip = ip
+        self.ok = None  # Result of the last probe, None until the host has been probed
+        self.checked_at = None  # time.monotonic() of the last probe
+        self.failures = 0  # Consecutive failed probes
+
+
+class Roster:
+    """Student hosts from the users IP file, indexed by UID.
+
+    The file is only re-parsed when its mtime, size or inode changes, which costs one
+    ``os.stat`` per check. A reload applies the difference to ``hosts``: new UIDs are added,
+    missing UIDs are dropped and hosts whose IP did not change keep their state.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hosts = {}
+        self._signature = None
+
+    def refresh(self):
+        """Reload the file if it changed on disk.
+
+        Returns the (added, removed, changed) UID lists from ``apply()`` if the roster was
+        re-parsed, or None if the file did not change.
+        """
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            signature = "missing"
+
+        if signature == self._signature:
+            return None
+        self._signature = signature
+
+        if signature == "missing":
+            logger.error("Error: %s not found.", self.path)
+            entries = {}
+        else:
+            try:
+                with open(self.path, "r") as f:
+                    entries = self.parse(f.read().splitlines())
+            except Exception as e:
+                logger.error("Unexpected error while reading %s: %s", self.path, e)
+                self._signature = None  # Try again on the next check
+                return None
+
+        return self.apply(entries)
+
+    def parse(self, lines):
+        """Parse "ip,uid" lines into a {uid: ip} dict, skipping malformed ones."""
+        entries = {}
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            parts = line.split(",")
+            if len(parts) != 2:
+                logger.error("Malformed line %s skipped: '%s'", line_number, line)
+                continue
+
+            ip, uid = parts[0].strip(), parts[1].strip()
+            if not is_valid_ip(ip):
+                logger.error("Invalid IP format on line %s: '%s'. Skipping.", line_number, ip)
+                continue
+            if not uid:
+                logger.error("Empty UID on line %s. Skipping.", line_number)
+                continue
+            if uid in entries:
+                logger.warning("Duplicate UID '%s' on line %s, keeping the last entry.", uid, line_number)
+
+            entries[uid] = ip
+        return entries
+
+    def apply(self, entries):
+        """Bring ``hosts`` in line with a freshly parsed {uid: ip} dict.
+
+        Returns the (added, removed, changed) UID lists.
+        """
+        removed = [uid for uid in self.hosts if uid not in entries]
+        for uid in removed:
+            del self.hosts[uid]
+
+        added = []
+        changed = []
+        for uid, ip in entries.items():
+            host = self.hosts.get(uid)
+            if host is None:
+                self.hosts[uid] = Host(uid, ip)
+                added.append(uid)
+            elif host.ip != ip:
+                self.hosts[uid] = Host(uid, ip)
+                changed.append(uid)
+
+        logger.info("Roster reloaded from %s: %s hosts (%s added, %s removed, %s changed IP).",
+                    self.path, len(self.hosts), len(added), len(removed), len(changed))
+        return added, removed, changed
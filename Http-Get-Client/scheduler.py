@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(failures, base, cap, jitter=0.1):
+    """Delay before the next probe of a host that failed ``failures`` times in a row."""
+    delay = min(base * 2 ** max(failures - 1, 0), cap)
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+class ProbeScheduler:
+    """Priority queue of hosts keyed on the time their next probe is due.
+
+    ``probe`` is an async callable taking a host key and returning the delay in seconds until
+    that host should be probed again, or None to stop probing it. If it raises, the host is
+    retried after ``error_delay`` seconds. At most ``max_concurrency`` probes run at once;
+    due hosts wait in the queue while all slots are busy.
+
+    The scheduler keeps simple metrics: queue depth, probes in flight, and how late probes
+    were dispatched compared to their due time.
+    """
+
+    def __init__(self, probe, max_concurrency, error_delay=5):
+        self._probe = probe
+        self._error_delay = error_delay
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._heap = []  # (due, seq, key)
+        self._due = {}  # key -> due time of its live heap entry, None while being probed
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._tasks = set()
+        self.in_flight = 0
+        self.probes = 0
+        self._lateness_total = 0.0
+        self._lateness_max = 0.0
+        self._lateness_count = 0
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, key):
+        return key in self._due
+
+    def schedule(self, key, delay):
+        """(Re)schedule ``key`` to be probed ``delay`` seconds from now."""
+        due = asyncio.get_running_loop().time() + delay
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._seq), key))
+        if self._heap[0][2] == key:
+            self._wakeup.set()
+
+    def remove(self, key):
+        """Stop probing ``key``. Its heap entry is discarded lazily when it comes up."""
+        self._due.pop(key, None)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while self._heap and self._heap[0][0] <= loop.time():
+                due, _, key = heapq.heappop(self._heap)
+                if self._due.get(key) != due:
+                    continue  # Rescheduled or removed since this entry was pushed
+                self._due[key] = None
+
+                await self._slots.acquire()
+                lateness = loop.time() - due
+                self._lateness_total += lateness
+                self._lateness_count += 1
+                self._lateness_max = max(self._lateness_max, lateness)
+
+                task = asyncio.create_task(self._run_one(key))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            timeout = self._heap[0][0] - loop.time() if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_one(self, key):
+        self.in_flight += 1
+        delay = None
+        try:
+            delay = await self._probe(key)
+        except Exception as e:
+            logger.error("Probe of %s failed unexpectedly: %s", key, e)
+            delay = self._error_delay
+        finally:
+            self.in_flight -= 1
+            self.probes += 1
+            self._slots.release()
+
+        # Only reschedule if the host was not removed while it was being probed
+        if key in self._due and self._due[key] is None:
+            if delay is None:
+                del self._due[key]
+            else:
+                self.schedule(key, delay)
+
+    def stats(self):
+        """Return the current metrics and reset the lateness window."""
+        count = self._lateness_count
+        stats = {
+            "queue_depth": len(self._due) - self.in_flight,
+            "in_flight": self.in_flight,
+            "probes": self.probes,
+            "lateness_avg_ms": round(1000 * self._lateness_total / count, 1) if count else 0.0,
+            "lateness_max_ms": round(1000 * self._lateness_max, 1),
+        }
+        self._lateness_total = 0.0
+        self._lateness_max = 0.0
+        self._lateness_count = 0
+        return stats
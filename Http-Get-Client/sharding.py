@@ -0,0 +1,236 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import queue
+import time
+
+import metrics
+from roster import Roster
+
+logger = logging.getLogger(__name__)
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to nodes.
+
+    Every node is placed on the ring ``replicas`` times so keys spread evenly. Adding or
+    removing a key never moves other keys to a different node.
+    """
+
+    def __init__(self, nodes, replicas=100):
+        points = []
+        for node in nodes:
+            for replica in range(replicas):
+                points.append((self._hash(f"{node}-{replica}"), node))
+        points.sort()
+        self._hashes = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def node_for(self, key):
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+    def split(self, keys):
+        """Group ``keys`` by node, returning {node: [keys]}."""
+        groups = {}
+        for key in keys:
+            groups.setdefault(self.node_for(key), []).append(key)
+        return groups
+
+
+class _ForwardingActionLog:
+    """Stands in for the action log writer in a worker and forwards entries to the coordinator."""
+
+    def __init__(self, outbox):
+        self._outbox = outbox
+
+    def start(self):
+        pass
+
+    def write(self, ip, uid, container_id):
+        self._outbox.put(("action", ip, uid, container_id))
+
+    def close(self):
+        pass
+
+
+class WorkerLink:
+    """A worker's side of the coordinator connection.
+
+    The coordinator pushes the worker's share of the roster and the port number; the worker
+    applies them to its own ``roster`` on ``poll()`` and sends back action log entries,
+    periodic stats and its metrics.
+    """
+
+    def __init__(self, index, inbox, outbox):
+        self.index = index
+        self.roster = Roster(f"shard {index}")
+        self.action_log = _ForwardingActionLog(outbox)
+        self._inbox = inbox
+        self._outbox = outbox
+        self._port = None
+
+    def poll(self):
+        """Apply pending coordinator messages. Returns (roster diff or None, port)."""
+        diff = None
+        while True:
+            try:
+                message = self._inbox.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "roster":
+                added, removed, changed = self.roster.apply(message[1])
+                if diff is not None:
+                    # Several updates arrived at once, fold them into one diff
+                    added = diff[0] + added
+                    removed = diff[1] + removed
+                    changed = diff[2] + changed
+                diff = (added, removed, changed)
+            elif message[0] == "port":
+                self._port = message[1]
+        return diff, self._port
+
+    def publish(self, stats):
+        self._outbox.put(("stats", self.index, stats))
+
+    def publish_metrics(self, collection):
+        self._outbox.put(("metrics", self.index, collection))
+
+
+def worker_main(index, container_id, inbox, outbox):
+    """Entry point of a shard worker process."""
+    import asyncio
+
+    import app
+    import profiler
+
+    profiler.install_signal_handler()
+    link = WorkerLink(index, inbox, outbox)
+    app.action_log = link.action_log
+    asyncio.run(app.run(container_id, link))
+
+
+def merge_stats(shard_stats):
+    """Combine per-shard stats dicts: maxima for *_max_* keys, averages for *_avg_*, sums otherwise."""
+    merged = {}
+    for stats in shard_stats.values():
+        for section, values in stats.items():
+            target = merged.setdefault(section, {})
+            for key, value in values.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                if "_max" in key:
+                    target[key] = max(target.get(key, value), value)
+                elif "_avg" in key or "ratio" in key:
+                    target[key] = round(target.get(key, 0) + value / len(shard_stats), 3)
+                else:
+                    target[key] = target.get(key, 0) + value
+    return merged
+
+
+class Coordinator:
+    """Splits the roster across ``shards`` worker processes and merges what they report.
+
+    Hosts are assigned to workers by a consistent hash of their UID. When the users IP file
+    changes, each worker receives its new share and only applies the difference, so most
+    hosts stay on the worker that already probes them.
+    """
+
+    def __init__(self, container_id, shards, user_ip_file, get_port, action_log,
+                 check_interval, stats_interval):
+        self.container_id = container_id
+        self.shards = shards
+        self.roster = Roster(user_ip_file)
+        self.ring = HashRing(range(shards))
+        self.get_port = get_port
+        self.action_log = action_log
+        self.check_interval = check_interval
+        self.stats_interval = stats_interval
+        self._ctx = multiprocessing.get_context("spawn")
+        self._outbox = self._ctx.Queue()
+        self._inboxes = [None] * shards
+        self._workers = [None] * shards
+        self._port = None
+        self.shard_stats = {}
+        self.shard_metrics = {}  # Shard index -> its latest metrics.Registry.collect()
+
+    def _start_worker(self, index):
+        inbox = self._ctx.Queue()
+        worker = self._ctx.Process(target=worker_main, name=f"prober-shard-{index}",
+                                   args=(index, self.container_id, inbox, self._outbox), daemon=True)
+        worker.start()
+        self._inboxes[index] = inbox
+        self._workers[index] = worker
+        return inbox
+
+    def _distribute(self, indexes):
+        groups = self.ring.split(self.roster.hosts)
+        for index in indexes:
+            share = {uid: self.roster.hosts[uid].ip for uid in groups.get(index, [])}
+            self._inboxes[index].put(("roster", share))
+            logger.info("Shard %s: %s hosts", index, len(share))
+
+    def run(self):
+        for index in range(self.shards):
+            self._start_worker(index)
+        self.action_log.start()
+
+        last_stats = time.monotonic()
+        try:
+            while True:
+                restarted = []
+                for index, worker in enumerate(self._workers):
+                    if not worker.is_alive():
+                        logger.error("Shard %s exited with code %s, restarting it.", index, worker.exitcode)
+                        inbox = self._start_worker(index)
+                        if self._port is not None:
+                            inbox.put(("port", self._port))
+                        restarted.append(index)
+
+                if self.roster.refresh() is not None:
+                    self._distribute(range(self.shards))
+                elif restarted:
+                    self._distribute(restarted)
+
+                port = self.get_port()
+                if port != self._port:
+                    self._port = port
+                    for inbox in self._inboxes:
+                        inbox.put(("port", port))
+
+                self._drain(time.monotonic() + self.check_interval)
+
+                if time.monotonic() - last_stats >= self.stats_interval and self.shard_stats:
+                    logger.info("%s shards: %s", len(self.shard_stats), merge_stats(self.shard_stats))
+                    last_stats = time.monotonic()
+        finally:
+            for worker in self._workers:
+                if worker is not None:
+                    worker.terminate()
+            self.action_log.close()
+
+    def _drain(self, until):
+        """Handle worker messages until the monotonic time ``until``."""
+        while True:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message = self._outbox.get(timeout=remaining)
+            except queue.Empty:
+                return
+            if message[0] == "action":
+                self.action_log.write(*message[1:])
+            elif message[0] == "stats":
+                self.shard_stats[message[1]] = message[2]
+            elif message[0] == "metrics":
+                self.shard_metrics[message[1]] = message[2]
+
+    def collect_metrics(self):
+        """The coordinator's metrics plus the sum of what the shards last reported."""
+        return metrics.merge([metrics.REGISTRY.collect(), *list(self.shard_metrics.values())])
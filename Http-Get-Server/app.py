@@ -1,26 +1,71 @@
-from flask import Flask, jsonify
-from datetime import datetime
+from flask import Flask, Response, request
+import os
+import time
+
+import metrics
+import profiler
+from health import HealthResponse
+from logconfig import setup_logging
+
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_PER_SECOND; see logconfig.py)
+setup_logging()
 
 app = Flask(__name__)
 
+CORS_HEADERS = [
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+    ("Access-Control-Allow-Headers", "Content-Type, Authorization"),
+]
+health = HealthResponse({
+    "serverType": "python",
+    "Exercise State": "Congratulations! You have successfully completed the exercise."
+}, CORS_HEADERS)
+
+# Requests per route and their latency, served at /metrics. Under gunicorn the workers add
+# theirs up through METRICS_DIR (set in gunicorn.conf.py).
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+REQUESTS = metrics.REGISTRY.counter("http_requests_total", "Requests served, by route and status", ("route", "status"))
+REQUEST_SECONDS = metrics.REGISTRY.histogram("http_request_duration_seconds", "Time spent serving requests, by route",
+                                             ("route",))
+metrics_source = metrics.SharedCollection(METRICS_DIR).start() if METRICS_DIR else metrics.REGISTRY
+
+@app.before_request
+def start_timer():
+    request.environ["metrics.started"] = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    started = request.environ.get("metrics.started")
+    if started is not None:
+        route = request.endpoint or "unmatched"
+        REQUEST_SECONDS.labels(route).observe(time.perf_counter() - started)
+        REQUESTS.labels(route, response.status_code).inc()
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(metrics_source.collect()), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/debug/profile', methods=['GET', 'POST'])
+def debug_profile():
+    # Sampled stack profiles on demand (see profiler.py); SIGUSR2 is installed at startup
+    status, content_type, body = profiler.admin(request.method, request.args.get("seconds"),
+                                                request.headers.get("X-Profile-Token"), request.args.get("pid"))
+    return Response(body, status=status, content_type=content_type)
+
 @app.route('/', methods=['GET'])
 def get_current_time():
-    now = datetime.now()
-    current_time = now.strftime("%Y-%m-%d %H:%M:%S")
-    serverType = "python"
-    return jsonify({
-        "current_time": current_time,
-        "serverType": serverType,
-        "Exercise State": "Congratulations! You have successfully completed the exercise."
-    })
+    return health.respond(request.headers.get("If-None-Match"))
 
 @app.after_request
 def add_cors_headers(response):
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    # The cached "/" response already carries them
+    if "Access-Control-Allow-Origin" not in response.headers:
+        response.headers.extend(CORS_HEADERS)
     return response
 
 if __name__ == '__main__':
+    profiler.install_signal_handler()
     print("latest image tag")
     app.run(host='0.0.0.0', port=5005)
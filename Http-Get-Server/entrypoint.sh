@@ -1,6 +1,12 @@
 #!/bin/sh
 
-  # Run the Python app
+  # SERVER_MODE=dev runs Flask's single-process development server instead of gunicorn.
+  # Workers and threads are configured in gunicorn.conf.py; send SIGHUP for a graceful restart.
+  if [ "$SERVER_MODE" = "dev" ]; then
+    echo "Starting the Python application (development server)..."
+    python app.py
+    exec "$@"
+  fi
+
   echo "Starting the Python application..."
-  python app.py
-  exec "$@"
\ No newline at end of file
+  exec gunicorn -c gunicorn.conf.py app:app
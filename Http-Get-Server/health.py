@@ -0,0 +1,55 @@
+import hashlib
+import json
+import time
+from datetime import datetime
+
+from flask import Response
+
+
+class HealthResponse:
+    """Cached response of the "/" health route.
+
+    The JSON body (the constant ``fields`` plus "current_time") and its ETag are rebuilt at
+    most once per second, when the timestamp changes. ``headers`` (CORS and the like) are
+    attached to every response as given. A request whose If-None-Match matches the current
+    ETag gets an empty 304.
+    """
+
+    def __init__(self, fields, headers):
+        self.fields = dict(fields)
+        self.headers = list(headers)
+        self._cached = (None, None, None, None)  # (second, body, etag, headers)
+
+    def _render(self, second):
+        current_time = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        # Same bytes as jsonify(): sorted keys, compact separators, trailing newline
+        body = (json.dumps(dict(self.fields, current_time=current_time), sort_keys=True,
+                           separators=(",", ":")) + "\n").encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        headers = self.headers + [("Content-Type", "application/json"), ("ETag", etag),
+                                  ("Cache-Control", "no-cache")]
+        self._cached = (second, body, etag, headers)
+        return self._cached
+
+    def respond(self, if_none_match=None):
+        second = int(time.time())
+        cached = self._cached
+        if cached[0] != second:
+            cached = self._render(second)
+        _, body, etag, headers = cached
+
+        if if_none_match is not None and etag_matches(etag, if_none_match):
+            return Response(status=304, headers=headers)
+        return Response(body, headers=headers)
+
+
+def etag_matches(etag, if_none_match):
+    """True if an If-None-Match value is "*" or lists ``etag``.
+
+    Its comma-separated tags are compared exactly, ignoring W/ (the weak comparison).
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
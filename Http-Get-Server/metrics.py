@@ -0,0 +1,366 @@
+import atexit
+import bisect
+import contextlib
+import fcntl
+import json
+import os
+import threading
+import time
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9100))  # Port of the /metrics endpoint; 0 = not served
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Cells:
+    """Per-thread slots of ``size`` numbers.
+
+    A thread only ever writes its own slot, so updates take no lock and are never lost;
+    readers add up the slots of every thread. The slots of threads that have exited are
+    folded into one retired total, so totals never go down and servers that start a
+    thread per request do not pile up slots.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._local = threading.local()
+        self._slots = []  # (thread, slot)
+        self._retired = [0] * size  # Sums of the slots of exited threads
+        self._prune_at = 64  # Slot count at which new threads trigger a prune
+        self._lock = threading.Lock()  # Only taken the first time a thread writes, and by readers
+
+    def mine(self):
+        try:
+            return self._local.slot
+        except AttributeError:
+            slot = self._local.slot = [0] * self._size
+            with self._lock:
+                self._slots.append((threading.current_thread(), slot))
+                if len(self._slots) >= self._prune_at:
+                    self._prune()
+                    self._prune_at = max(64, 2 * len(self._slots))
+            return slot
+
+    def _prune(self):
+        """Fold the slots of exited threads into the retired total. Called with the lock held."""
+        live = []
+        for thread, slot in self._slots:
+            if thread.is_alive():
+                live.append((thread, slot))
+            else:
+                for i, value in enumerate(slot):
+                    self._retired[i] += value
+        self._slots = live
+
+    def totals(self):
+        with self._lock:
+            self._prune()
+            totals = list(self._retired)
+            slots = [slot for _, slot in self._slots]
+        for slot in slots:
+            for i, value in enumerate(slot):
+                totals[i] += value
+        return totals
+
+
+class Counter:
+    def __init__(self):
+        self._cells = _Cells(1)
+
+    def inc(self, amount=1):
+        self._cells.mine()[0] += amount
+
+    def samples(self, name, labels):
+        return [(name, labels, self._cells.totals()[0])]
+
+
+class Histogram:
+    """Counts observations into fixed buckets and keeps their sum."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = tuple(sorted(buckets))
+        self._cells = _Cells(len(self._buckets) + 2)  # One per bucket, one for +Inf, then the sum
+
+    def observe(self, value):
+        slot = self._cells.mine()
+        slot[bisect.bisect_left(self._buckets, value)] += 1
+        slot[-1] += value
+
+    def samples(self, name, labels):
+        totals = self._cells.totals()
+        samples = []
+        count = 0
+        for bound, observed in zip(self._buckets + (float("inf"),), totals):
+            count += observed
+            samples.append((f"{name}_bucket", labels + (("le", _number(bound)),), count))
+        samples.append((f"{name}_sum", labels, totals[-1]))
+        samples.append((f"{name}_count", labels, count))
+        return samples
+
+
+class _FunctionGauge:
+    def __init__(self, function):
+        self._function = function
+
+    def samples(self, name, labels):
+        return [(name, labels, self._function())]
+
+
+class Family:
+    """A metric name with its help text and one child metric per combination of label values."""
+
+    def __init__(self, name, kind, help, labelnames, make_child):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._make_child = make_child
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The child for these label values, created on first use. Keep it to skip the lookup."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._make_child()
+        return child
+
+    def collect(self):
+        samples = []
+        for values, child in list(self._children.items()):
+            samples.extend(child.samples(self.name, tuple(zip(self.labelnames, values))))
+        return (self.name, self.kind, self.help, samples)
+
+
+class Registry:
+    """The metrics of one process. ``collect()`` returns plain tuples that ``render()`` formats."""
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Family(name, "counter", help, labelnames, Counter))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Family(name, "histogram", help, labelnames, lambda: Histogram(buckets)))
+
+    def gauge(self, name, help, function):
+        """A gauge whose value is ``function()`` at collection time."""
+        family = self._register(Family(name, "gauge", help, (), lambda: _FunctionGauge(function)))
+        family.labels()
+        return family
+
+    def _register(self, family):
+        with self._lock:
+            if family.name in self._families:
+                raise ValueError(f"Metric {family.name} is already registered")
+            self._families[family.name] = family
+        return family
+
+    def collect(self):
+        return [family.collect() for family in list(self._families.values())]
+
+
+REGISTRY = Registry()
+
+
+def merge(collections):
+    """Add up several ``collect()`` results (from worker processes, say) sample by sample."""
+    families = {}
+    for collection in collections:
+        for name, kind, help, samples in collection:
+            totals = families.setdefault(name, (kind, help, {}))[2]
+            for sample, labels, value in samples:
+                key = (sample, tuple(tuple(pair) for pair in labels))
+                totals[key] = totals.get(key, 0) + value
+    return [(name, kind, help, [(sample, labels, value) for (sample, labels), value in totals.items()])
+            for name, (kind, help, totals) in families.items()]
+
+
+def render(collection):
+    """Format a ``collect()`` result in the Prometheus text exposition format."""
+    lines = []
+    for name, kind, help, samples in collection:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample, labels, value in samples:
+            if labels:
+                text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+                lines.append(f"{sample}{{{text}}} {_number(value)}")
+            else:
+                lines.append(f"{sample} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SharedCollection:
+    """Combines the metrics of the processes of one server (gunicorn workers) through files.
+
+    Every process writes its registry to ``directory/<pid>.json`` every ``interval``
+    seconds, and ``collect()`` adds up all the files, with the calling process's own numbers
+    fresh. When a process has exited, its counters and histograms are added to
+    ``retired.json`` and its file removed, so counters do not drop when a worker is recycled
+    and the files do not pile up; its gauges are dropped. An flock on ``.lock`` keeps
+    readers from seeing a file both retired and still there.
+    """
+
+    RETIRED = "retired.json"
+
+    def __init__(self, directory, registry=REGISTRY, interval=1.0):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self._path = os.path.join(directory, f"{os.getpid()}.json")
+        self._write_lock = threading.Lock()
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        threading.Thread(target=self._run, name="metrics-writer", daemon=True).start()
+        atexit.register(self._write)  # A recycled worker's last numbers, newer than its last write
+        return self
+
+    def _run(self):
+        while True:
+            self._write()
+            time.sleep(self.interval)
+
+    def _write(self):
+        with self._write_lock:  # The writer thread, scrapes and exit share the temporary file
+            collection = self.registry.collect()
+            tmp = f"{self._path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(collection, f, separators=(",", ":"))
+            os.replace(tmp, self._path)
+            return collection
+
+    def collect(self):
+        collections = [self._write()]
+        with self._locked(fcntl.LOCK_SH):
+            others, dead = self._read()
+        if dead:
+            with self._locked(fcntl.LOCK_EX):
+                self._retire(dead)
+            with self._locked(fcntl.LOCK_SH):
+                others, _ = self._read()
+        return merge(collections + others)
+
+    def _read(self):
+        """The other files' collections, and the names of those of exited processes."""
+        collections = []
+        dead = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(".json") or path == self._path:
+                continue
+            collection = _load(path)
+            if collection is None:
+                continue  # Being replaced right now; its numbers are in the next scrape
+            if name != self.RETIRED and not _alive(int(name[:-len(".json")])):
+                dead.append(name)
+                collection = [family for family in collection if family[1] != "gauge"]
+            collections.append(collection)
+        return collections, dead
+
+    def _retire(self, names):
+        """Fold the files ``names`` of exited processes into RETIRED. Called with the lock held."""
+        retired_path = os.path.join(self.directory, self.RETIRED)
+        retired = [_load(retired_path) or []]
+        paths = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            collection = _load(path)
+            if collection is None:
+                continue  # Already retired by another process
+            retired.append([family for family in collection if family[1] != "gauge"])
+            paths.append(path)
+        if not paths:
+            return
+        tmp = f"{retired_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(merge(retired), f, separators=(",", ":"))
+        os.replace(tmp, retired_path)
+        for path in paths:
+            os.remove(path)
+
+    @contextlib.contextmanager
+    def _locked(self, operation):
+        with open(os.path.join(self.directory, ".lock"), "a") as f:
+            fcntl.flock(f, operation)
+            yield
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def serve(collect=REGISTRY.collect, port=METRICS_PORT, host="0.0.0.0", routes=None):
+    """Serve ``render(collect())`` at http://host:port/metrics from a daemon thread.
+
+    ``routes`` adds other paths: {path: function(method, query, headers)} returning
+    (status, content type, body bytes), with ``query`` as parsed by parse_qs. Returns the
+    server, or None when ``port`` is 0.
+    """
+    if not port:
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs
+
+    def metrics_route(method, query, headers):
+        return 200, CONTENT_TYPE, render(collect()).encode()
+
+    handlers = dict(routes or {}, **{"/metrics": metrics_route})
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            route = handlers.get(path)
+            if route is None:
+                self.send_error(404)
+                return
+            status, content_type, body = route(self.command, parse_qs(query), self.headers)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_POST = do_GET
+
+        def log_message(self, format, *args):
+            pass  # A line per scrape is noise
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
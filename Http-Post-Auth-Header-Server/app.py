@@ -1,62 +1,88 @@
-import json
-from flask import Flask, jsonify, request
-from datetime import datetime
+from flask import Flask, Response, jsonify, request
 import logging
+import os
+import time
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,  # Set to DEBUG to capture all levels of log messages
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Output to console
-        # Uncomment the next line to also log to a file
-        # logging.FileHandler("/var/log/application.log"),
-    ]
-)
+import metrics
+import profiler
+from guard import RateLimiter, SharedRateLimiter, secrets_match
+from health import HealthResponse
+from logconfig import setup_logging
+from variables import load_variables
+
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_PER_SECOND; see logconfig.py)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-VARIABLES_FILE = "/variables.txt"  # Ensure the file path is correct
-
-def load_variables():
-    """Read the variables from the file."""
-    try:
-        with open(VARIABLES_FILE, "r") as f:
-            # Read the raw content
-            raw_content = f.read().strip()
-
-            # Preprocess the content to make it valid JSON
-            if not raw_content.startswith("{") or not raw_content.endswith("}"):
-                raise ValueError("Invalid JSON format in the file.")
 
-            # Convert to valid JSON format: Add double quotes around keys and values
-            json_content = raw_content.replace("{", '{"').replace("}", '"}').replace(":", '":"').replace(",", '","')
+CORS_HEADERS = [
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+    ("Access-Control-Allow-Headers", "Content-Type, Authorization, SECRET_KEY"),
+]
+health = HealthResponse({
+    "serverType": "python",
+    "Exercise State": "Congratulations! You have successfully completed the exercise."
+}, CORS_HEADERS)
+
+# Throttle /unlock-treasure per client IP so brute-force scripts are turned away cheaply
+UNLOCK_RATE = float(os.environ.get("UNLOCK_RATE", 5))  # Attempts per second refilled per client
+UNLOCK_BURST = int(os.environ.get("UNLOCK_BURST", 10))  # Attempts a client can make back to back
+UNLOCK_MAX_CLIENTS = int(os.environ.get("UNLOCK_MAX_CLIENTS", 10000))  # Clients tracked before evicting the oldest
+# Under gunicorn the workers share their buckets through this file (set in gunicorn.conf.py),
+# so a client gets UNLOCK_RATE in total rather than per worker
+UNLOCK_LIMITS_FILE = os.environ.get("UNLOCK_LIMITS_FILE", "")
+if UNLOCK_LIMITS_FILE:
+    limiter = SharedRateLimiter(UNLOCK_LIMITS_FILE, UNLOCK_RATE, UNLOCK_BURST, UNLOCK_MAX_CLIENTS)
+else:
+    limiter = RateLimiter(UNLOCK_RATE, UNLOCK_BURST, UNLOCK_MAX_CLIENTS)
+
+TOO_MANY_ATTEMPTS_BODY = b'{"Exercise State":"Sorry! Too many attempts, slow down."}\n'
+TOO_MANY_ATTEMPTS_HEADERS = CORS_HEADERS + [("Content-Type", "application/json"), ("Retry-After", "1")]
+
+# Requests per route and their latency, served at /metrics. Under gunicorn the workers add
+# theirs up through METRICS_DIR (set in gunicorn.conf.py).
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+REQUESTS = metrics.REGISTRY.counter("http_requests_total", "Requests served, by route and status", ("route", "status"))
+REQUEST_SECONDS = metrics.REGISTRY.histogram("http_request_duration_seconds", "Time spent serving requests, by route",
+                                             ("route",))
+UNLOCK_ATTEMPTS = metrics.REGISTRY.counter("unlock_attempts_total", "POST /unlock-treasure attempts, by result",
+                                          ("result",))
+UNLOCKED = UNLOCK_ATTEMPTS.labels("unlocked")
+WRONG_KEY = UNLOCK_ATTEMPTS.labels("wrong_key")
+THROTTLED = UNLOCK_ATTEMPTS.labels("throttled")
+metrics_source = metrics.SharedCollection(METRICS_DIR).start() if METRICS_DIR else metrics.REGISTRY
+
+@app.before_request
+def start_timer():
+    request.environ["metrics.started"] = time.perf_counter()
 
-            # Deserialize the JSON string into a Python dictionary
-            file_content = json.loads(json_content)
-            logger.debug(f"Variables file content: {file_content}")
-            return file_content
-    except FileNotFoundError:
-        logger.error(f"Error: {VARIABLES_FILE} not found.")
-        return None
-    except Exception as e:
-        logger.error(f"Unexpected error while reading {VARIABLES_FILE}: {e}")
-        return None
+@app.after_request
+def record_request(response):
+    started = request.environ.get("metrics.started")
+    if started is not None:
+        route = request.endpoint or "unmatched"
+        REQUEST_SECONDS.labels(route).observe(time.perf_counter() - started)
+        REQUESTS.labels(route, response.status_code).inc()
+    return response
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(metrics_source.collect()), content_type=metrics.CONTENT_TYPE)
 
+@app.route('/debug/profile', methods=['GET', 'POST'])
+def debug_profile():
+    # Sampled stack profiles on demand (see profiler.py); SIGUSR2 is installed at startup
+    status, content_type, body = profiler.admin(request.method, request.args.get("seconds"),
+                                                request.headers.get("X-Profile-Token"), request.args.get("pid"))
+    return Response(body, status=status, content_type=content_type)
 
 #  health get req on  /
 @app.route('/', methods=['GET'])
 def get_current_time():
-    now = datetime.now()
-    current_time = now.strftime("%Y-%m-%d %H:%M:%S")
-    serverType = "python"
-    return jsonify({
-        "current_time": current_time,
-        "serverType": serverType,
-        "Exercise State": "Congratulations! You have successfully completed the exercise."
-    })
+    return health.respond(request.headers.get("If-None-Match"))
 
 @app.route('/get-secret-key', methods=['GET'])
 def get_auth_key():
@@ -80,37 +106,40 @@ def get_auth_key():
 
 @app.route('/unlock-treasure', methods=['POST'])  # Fixed the route path
 def auth_key():
+    if not limiter.allow(request.remote_addr):
+        THROTTLED.inc()
+        return Response(TOO_MANY_ATTEMPTS_BODY, status=429, headers=TOO_MANY_ATTEMPTS_HEADERS)
+
     variables = load_variables()
     if not variables:
         return jsonify({
             "Exercise State": "Sorry! Something went wrong. Please try again later."
         }), 500
-    # log all req header
-    secret_key = request.headers.get('Secretkey')
-    # print both
-    logger.info(f"Secret key from headers: {secret_key}")
-    logger.info(f"Secret key from variables: {variables.get('secret')}")
-    # Compare the secret key from headers with the one from the variables file
 
-    if secret_key == variables.get("secret"):
+    # Compare the secret key from headers with the one from the variables file
+    if secrets_match(request.headers.get('Secretkey'), variables.get("secret")):
+        UNLOCKED.inc()
+        logger.info("Treasure unlocked by %s", request.remote_addr)
         return jsonify({
             "status": "success",
             "message": "You found the treasure!",
             "reward": "Golden Key of Knowledge"
         })
     else:
+        WRONG_KEY.inc()
         return jsonify({
             "Exercise State": "Sorry! Wrong Key."
         }), 401
 
 @app.after_request
 def add_cors_headers(response):
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, SECRET_KEY"
+    # The cached "/" response already carries them
+    if "Access-Control-Allow-Origin" not in response.headers:
+        response.headers.extend(CORS_HEADERS)
     return response
 
 if __name__ == '__main__':
+    profiler.install_signal_handler()
     vals =load_variables()
-    logger.info(f"Variables loaded: {vals}")
+    logger.info("Variables loaded; the exercise port is %s", (vals or {}).get("port"))
     app.run(host='0.0.0.0', port=5010)
\ No newline at end of file
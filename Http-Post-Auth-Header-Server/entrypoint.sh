@@ -4,7 +4,13 @@
 echo "Container has started and will create an award application HTML file."
 echo '<html><body><h1>Award Application</h1><p>This is the award application page.</p></body></html>' > /app/award_application.html
 
-# Run the Python app
+# SERVER_MODE=dev runs Flask's single-process development server instead of gunicorn.
+# Workers and threads are configured in gunicorn.conf.py; send SIGHUP for a graceful restart.
+if [ "$SERVER_MODE" = "dev" ]; then
+  echo "Starting the Python application (development server)..."
+  python app.py
+  exec "$@"
+fi
+
 echo "Starting the Python application..."
-python app.py
-exec "$@"
\ No newline at end of file
+exec gunicorn -c gunicorn.conf.py app:app
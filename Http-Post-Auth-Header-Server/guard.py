@@ -0,0 +1,114 @@
+import fcntl
+import hashlib
+import hmac
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+
+def secrets_match(supplied, expected):
+    """Compare a supplied secret with the real one in constant time."""
+    if supplied is None or expected is None:
+        return False
+    return hmac.compare_digest(supplied.encode(), expected.encode())
+
+
+class RateLimiter:
+    """Token bucket per client, refilled at ``rate`` tokens per second up to ``burst``.
+
+    At most ``max_clients`` buckets are kept; the least recently seen client is forgotten
+    first, which only ever gives that client a fresh, full bucket.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> [tokens, last refill time]
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def allow(self, client):
+        """Take one token from ``client``'s bucket. Returns False if it is empty."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                self.rejected += 1
+                return False
+            bucket[0] -= 1
+            self.allowed += 1
+            return True
+
+    def stats(self):
+        return {
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+        }
+
+
+class SharedRateLimiter:
+    """RateLimiter whose buckets are shared by every process that opens the same ``path``.
+
+    The buckets live in a memory-mapped file, so the gunicorn workers of one server enforce
+    one limit between them instead of one each. The file is a fixed table of ``slots``
+    buckets indexed by a hash of the client. A client whose slot has been taken over by
+    another starts again with a full bucket, like a client RateLimiter has evicted. Every
+    update holds an flock on the file.
+    """
+
+    _SLOT = struct.Struct("<Qdd")  # Client hash (0 = free), tokens, time.monotonic() of the last refill
+
+    def __init__(self, path, rate, burst, slots=10000):
+        self.rate = rate
+        self.burst = burst
+        self.slots = slots
+        size = slots * self._SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()  # flock does not exclude threads sharing the descriptor
+
+    def allow(self, client):
+        """Take one token from ``client``'s bucket. Returns False if it is empty."""
+        digest = hashlib.blake2b(str(client).encode(), digest_size=8).digest()
+        key = int.from_bytes(digest, "little") or 1
+        offset = key % self.slots * self._SLOT.size
+        now = time.monotonic()  # The same clock in every process
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                owner, tokens, last = self._SLOT.unpack_from(self._map, offset)
+                if owner == key:
+                    tokens = min(self.burst, tokens + (now - last) * self.rate)
+                else:
+                    tokens = self.burst
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                self._SLOT.pack_into(self._map, offset, key, tokens, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return allowed
@@ -0,0 +1,70 @@
+# Production serving settings for gunicorn, used by entrypoint.sh.
+# Every value can be overridden through the environment of the container.
+import math
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5010)}"
+
+
+def available_cpus():
+    """CPUs this container may use: its CPU affinity, capped by a cgroup CPU quota."""
+    cpus = len(os.sched_getaffinity(0))
+    for path, period_path in (("/sys/fs/cgroup/cpu.max", None),  # cgroup v2: "<quota|max> <period>"
+                              ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")):
+        try:
+            with open(path) as f:
+                quota, _, period = f.read().strip().partition(" ")
+            if period_path:
+                with open(period_path) as f:
+                    period = f.read().strip()
+            if quota not in ("max", "-1"):
+                cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+            break
+        except (OSError, ValueError):
+            continue
+    return cpus
+
+
+# Worker processes, each serving requests on a pool of threads. Every student container runs
+# its own server, so the default stays small however many CPUs the host has.
+MAX_DEFAULT_WORKERS = 4
+workers = int(os.environ.get("WEB_WORKERS", min(available_cpus() * 2 + 1, MAX_DEFAULT_WORKERS)))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", 4))
+backlog = int(os.environ.get("WEB_BACKLOG", 2048))
+
+# Keep client connections open between requests
+keepalive = int(os.environ.get("WEB_KEEPALIVE", 5))
+
+# Recycle workers now and then; the jitter keeps them from all restarting at once
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 100000))
+max_requests_jitter = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 10000))
+
+# On SIGHUP or SIGTERM, workers finish their in-flight requests for up to this many seconds
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+
+accesslog = os.environ.get("WEB_ACCESS_LOG") or None  # "-" logs every request to stdout
+errorlog = "-"
+loglevel = os.environ.get("WEB_LOG_LEVEL", "info")
+
+# Workers write their metrics here so /metrics adds up all of them (see metrics.py)
+metrics_dir = os.environ.setdefault("METRICS_DIR", "/tmp/gunicorn-metrics")
+# ...and share the /unlock-treasure rate limits here (see guard.SharedRateLimiter)
+unlock_limits_file = os.environ.setdefault("UNLOCK_LIMITS_FILE", "/tmp/gunicorn-unlock-limits")
+
+
+def on_starting(server):
+    # Counters and rate limits start afresh with the server, not with leftovers of an earlier run
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    try:
+        os.remove(unlock_limits_file)
+    except FileNotFoundError:
+        pass
+
+
+def post_worker_init(worker):
+    # SIGUSR2 to a worker profiles it (see profiler.py); the master keeps SIGUSR2 for upgrades
+    import profiler
+    profiler.install_signal_handler()
@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+VARIABLES_FILE = os.environ.get("VARIABLES_FILE", "/variables.txt")
+CHECK_INTERVAL = 1.0  # Seconds between checks whether the file changed on disk
+
+# A key starts the content or follows a comma: "{secret:abc,port:5007}"
+_KEY = re.compile(r'(?:^|,)\s*"?([A-Za-z_][\w-]*)"?\s*:')
+
+
+def parse_variables(raw_content):
+    """Parse the "{key:value,key:value}" variables format into a dict of strings.
+
+    Values may contain ":" and "," as long as a comma is not followed by something that
+    looks like "key:". Content that is already valid JSON is accepted as well.
+    """
+    raw_content = raw_content.strip()
+    if not raw_content.startswith("{") or not raw_content.endswith("}"):
+        raise ValueError("Invalid format in the file, expected {key:value,...}.")
+
+    try:
+        parsed = json.loads(raw_content)
+        return {str(key): str(value) for key, value in parsed.items()}
+    except ValueError:
+        pass
+
+    body = raw_content[1:-1]
+    matches = list(_KEY.finditer(body))
+    if body.strip() and (not matches or matches[0].start() != 0):
+        raise ValueError("Invalid format in the file, expected {key:value,...}.")
+
+    variables = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(body)
+        variables[match.group(1)] = body[match.end():end].strip().strip('"')
+    return variables
+
+
+class VariablesFile:
+    """The parsed contents of a variables file, cached in memory.
+
+    ``get()`` checks at most once per ``check_interval`` seconds whether the file's inode,
+    mtime or size changed, and only then reads and parses it again.
+    """
+
+    def __init__(self, path, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._values = None
+        self._signature = "unread"  # (inode, mtime, size) of the loaded file, None if missing
+        self._checked_at = None
+
+    def get(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._values
+        self._checked_at = now
+
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            signature = None
+
+        if signature != self._signature:
+            self._signature = signature
+            if signature is None:
+                logger.error("Error: %s not found.", self.path)
+                self._values = None
+            else:
+                self._values = self._read()
+        return self._values
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                variables = parse_variables(f.read())
+            logger.debug("Variables file %s loaded with keys: %s", self.path, sorted(variables))
+            return variables
+        except Exception as e:
+            logger.error("Unexpected error while reading %s: %s", self.path, e)
+            return None
+
+
+_files = {}
+
+
+def load_variables(path=None):
+    """Return the variables from ``path`` (VARIABLES_FILE by default), or None if unreadable."""
+    path = path or VARIABLES_FILE
+    variables_file = _files.get(path)
+    if variables_file is None:
+        variables_file = _files[path] = VariablesFile(path)
+    return variables_file.get()
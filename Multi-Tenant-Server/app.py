@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import resource
+
+import metrics
+import profiler
+from exercises import EXERCISES, protocol_factory
+from logconfig import setup_logging
+from variables import VariablesFile
+
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_PER_SECOND; see logconfig.py)
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TENANTS_DIR = os.environ.get("TENANTS_DIR", "/tenants")  # <exercise>/<tenant>.txt variables files, see below
+TENANTS_HOST = os.environ.get("TENANTS_HOST", "0.0.0.0")
+RESCAN_INTERVAL = float(os.environ.get("RESCAN_INTERVAL", 5))  # Seconds between checks for added, removed or moved tenants
+LISTEN_BACKLOG = int(os.environ.get("LISTEN_BACKLOG", 128))  # Pending connections queued per tenant port
+
+# Tenants: TENANTS_DIR holds one directory per exercise (see exercises.EXERCISES) and in it
+# one variables file per tenant, in the same "{secret:...,port:...}" format the single
+# exercise images read. Every tenant listens on the port from its file; its other
+# variables (the secret) are read on use, so they can change without a restart.
+
+
+class Tenant:
+    """One exercise instance: its variables file and the server listening on its port."""
+
+    def __init__(self, exercise, path):
+        self.exercise = exercise
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self._variables = VariablesFile(path)
+        self.port = None
+        self.server = None
+
+    def variables(self):
+        return self._variables.get()
+
+
+class TenantManager:
+    """Keeps one listening server per tenant file on the running event loop."""
+
+    def __init__(self, directory, host):
+        self.directory = directory
+        self.host = host
+        self.tenants = {}  # path -> Tenant
+
+    def listening(self):
+        return sum(tenant.server is not None for tenant in self.tenants.values())
+
+    def _scan(self):
+        found = {}
+        for exercise in EXERCISES:
+            directory = os.path.join(self.directory, exercise)
+            try:
+                names = os.listdir(directory)
+            except FileNotFoundError:
+                continue
+            for name in names:
+                if not name.startswith("."):
+                    found[os.path.join(directory, name)] = exercise
+        return found
+
+    async def refresh(self):
+        """Start servers for new tenants, stop removed ones and move those whose port changed."""
+        found = self._scan()
+        for path in [path for path in self.tenants if path not in found]:
+            tenant = self.tenants.pop(path)
+            self._stop(tenant)
+            logger.info("Removed %s tenant %s", tenant.exercise, tenant.name)
+
+        for path, exercise in found.items():
+            tenant = self.tenants.get(path)
+            if tenant is None:
+                tenant = self.tenants[path] = Tenant(exercise, path)
+            port = _port(tenant.variables())
+            if port == tenant.port and tenant.server is not None:
+                continue
+            self._stop(tenant)
+            if port is not None:
+                await self._start(tenant, port)
+
+    async def _start(self, tenant, port):
+        loop = asyncio.get_running_loop()
+        try:
+            tenant.server = await loop.create_server(protocol_factory(tenant.exercise, tenant), self.host, port,
+                                                     reuse_address=True, backlog=LISTEN_BACKLOG)
+        except OSError as e:
+            logger.error("%s tenant %s cannot listen on port %s: %s", tenant.exercise, tenant.name, port, e)
+            return
+        tenant.port = port
+        logger.info("%s tenant %s is listening on port %s", tenant.exercise, tenant.name, port)
+
+    @staticmethod
+    def _stop(tenant):
+        if tenant.server is not None:
+            tenant.server.close()  # Stops listening; open connections end on their own
+            tenant.server = None
+            tenant.port = None
+
+    async def run(self, interval=RESCAN_INTERVAL):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(interval)
+
+
+def _port(variables):
+    try:
+        return int(variables["port"])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def raise_file_limit():
+    """Every tenant holds a listening socket; allow as many open files as the hard limit does."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == hard:
+        return
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError) as e:
+        logger.warning("Cannot raise the open file limit from %s: %s", soft, e)
+
+
+async def serve():
+    manager = TenantManager(TENANTS_DIR, TENANTS_HOST)
+    metrics.REGISTRY.gauge("tenants_listening", "Tenants with a listening server", manager.listening)
+    logger.info("Serving the tenants in %s", TENANTS_DIR)
+    await manager.run()
+
+
+def main():
+    raise_file_limit()
+    metrics.serve(routes={"/debug/profile": profiler.admin_route})
+    profiler.install_signal_handler()
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+#!/bin/sh
+
+echo "Starting the multi-tenant exercise server..."
+# exec so SIGTERM from docker stop reaches the server
+exec python app.py
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+import metrics
+from guard import RateLimiter, secrets_match
+from protocols import EchoProtocol, HttpProtocol
+
+HTTP_KEEPALIVE = float(os.environ.get("HTTP_KEEPALIVE", 5))  # Close idle HTTP connections after this many seconds
+IDLE_TIMEOUT = float(os.environ.get("IDLE_TIMEOUT", 300))  # Close echo connections silent for this many seconds
+SENTINEL = b"Bye bye"  # The echo exercise closes the connection after echoing this
+
+# Throttle /unlock-treasure per tenant and client IP, like Http-Post-Auth-Header-Server
+UNLOCK_RATE = float(os.environ.get("UNLOCK_RATE", 5))  # Attempts per second refilled per client
+UNLOCK_BURST = int(os.environ.get("UNLOCK_BURST", 10))  # Attempts a client can make back to back
+UNLOCK_MAX_CLIENTS = int(os.environ.get("UNLOCK_MAX_CLIENTS", 10000))  # Clients tracked before evicting the oldest
+limiter = RateLimiter(UNLOCK_RATE, UNLOCK_BURST, UNLOCK_MAX_CLIENTS)
+
+REQUESTS = metrics.REGISTRY.counter("tenant_http_requests_total", "HTTP requests served, by exercise and status",
+                                    ("exercise", "status"))
+ECHOED_BYTES = metrics.REGISTRY.counter("tenant_echo_bytes_total", "Bytes echoed by echo tenants").labels()
+
+GET_CORS_HEADERS = [
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+    ("Access-Control-Allow-Headers", "Content-Type, Authorization"),
+]
+AUTH_CORS_HEADERS = [
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+    ("Access-Control-Allow-Headers", "Content-Type, Authorization, SECRET_KEY"),
+]
+COMPLETED = {
+    "serverType": "python",
+    "Exercise State": "Congratulations! You have successfully completed the exercise."
+}
+
+
+def json_body(value):
+    # Same bytes as Flask's jsonify(): sorted keys, compact separators, trailing newline
+    return (json.dumps(value, sort_keys=True, separators=(",", ":")) + "\n").encode()
+
+
+class HealthResponse:
+    """The "/" health response of Http-Get-Server, shared by every tenant of an exercise.
+
+    The body and its ETag are rebuilt at most once per second; a request whose
+    If-None-Match matches the current ETag gets an empty 304.
+    """
+
+    def __init__(self, fields, headers):
+        self.fields = dict(fields)
+        self.headers = list(headers)
+        self._cached = (None, None, None, None)  # (second, body, etag, headers)
+
+    def respond(self, if_none_match=None):
+        second = int(time.time())
+        if self._cached[0] != second:
+            current_time = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+            body = json_body(dict(self.fields, current_time=current_time))
+            etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+            headers = self.headers + [("Content-Type", "application/json"), ("ETag", etag),
+                                      ("Cache-Control", "no-cache")]
+            self._cached = (second, body, etag, headers)
+        _, body, etag, headers = self._cached
+        if if_none_match is not None and etag_matches(etag, if_none_match):
+            return 304, headers, b""
+        return 200, headers, body
+
+
+def etag_matches(etag, if_none_match):
+    """True if an If-None-Match value is "*" or lists ``etag``.
+
+    Its comma-separated tags are compared exactly, ignoring W/ (the weak comparison).
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+get_health = HealthResponse(COMPLETED, GET_CORS_HEADERS)
+auth_health = HealthResponse(COMPLETED, AUTH_CORS_HEADERS)
+
+
+def _json(status, value, cors):
+    return status, cors + [("Content-Type", "application/json")], json_body(value)
+
+
+def get_current_time(tenant, request, health):
+    return health.respond(request.headers.get("if-none-match"))
+
+
+def get_auth_key(tenant, request, health):
+    variables = tenant.variables()
+    secret_key = (variables or {}).get("secret", "").strip()
+    if not secret_key:
+        return _json(404, {"Exercise State": "Sorry! No key found."}, AUTH_CORS_HEADERS)
+    return _json(200, {
+        "secret_key": secret_key,
+        "Header Name": "Secretkey",
+        "Exercise State": "Congratulations! You did your first step, now try to use this key to complete the exercise."
+    }, AUTH_CORS_HEADERS)
+
+
+def auth_key(tenant, request, health):
+    if not limiter.allow((tenant.port, request.peer[0] if request.peer else None)):
+        return 429, AUTH_CORS_HEADERS + [("Content-Type", "application/json"), ("Retry-After", "1")], \
+            b'{"Exercise State":"Sorry! Too many attempts, slow down."}\n'
+    variables = tenant.variables()
+    if not variables:
+        return _json(500, {"Exercise State": "Sorry! Something went wrong. Please try again later."},
+                     AUTH_CORS_HEADERS)
+    if secrets_match(request.headers.get("secretkey"), variables.get("secret")):
+        return _json(200, {
+            "status": "success",
+            "message": "You found the treasure!",
+            "reward": "Golden Key of Knowledge"
+        }, AUTH_CORS_HEADERS)
+    return _json(401, {"Exercise State": "Sorry! Wrong Key."}, AUTH_CORS_HEADERS)
+
+
+# Exercise -> (routes {path: {method: view}}, CORS headers, health response)
+HTTP_EXERCISES = {
+    "http-get": ({"/": {"GET": get_current_time}}, GET_CORS_HEADERS, get_health),
+    "http-auth": ({
+        "/": {"GET": get_current_time},
+        "/get-secret-key": {"GET": get_auth_key},
+        "/unlock-treasure": {"POST": auth_key},
+    }, AUTH_CORS_HEADERS, auth_health),
+}
+
+
+def http_handler(exercise, tenant):
+    """The request handler of one HTTP tenant, for protocols.HttpProtocol."""
+    routes, cors, health = HTTP_EXERCISES[exercise]
+    counters = {}  # status -> counter, to skip the label lookup
+
+    def handle(request):
+        methods = routes.get(request.path)
+        if methods is None:
+            response = 404, cors, b""
+        elif request.method == "OPTIONS":
+            response = 200, cors + [("Allow", ", ".join(sorted(methods) + ["OPTIONS"]))], b""
+        else:
+            view = methods.get("GET" if request.method == "HEAD" else request.method)
+            response = (405, cors, b"") if view is None else view(tenant, request, health)
+        counter = counters.get(response[0])
+        if counter is None:
+            counter = counters[response[0]] = REQUESTS.labels(exercise, response[0])
+        counter.inc()
+        return response
+
+    return handle
+
+
+class CountingEchoProtocol(EchoProtocol):
+    def data_received(self, data):
+        ECHOED_BYTES.inc(len(data))
+        super().data_received(data)
+
+
+def protocol_factory(exercise, tenant):
+    """What loop.create_server() needs to serve ``tenant`` as an ``exercise`` instance."""
+    if exercise == "echo":
+        return lambda: CountingEchoProtocol(SENTINEL, IDLE_TIMEOUT)
+    handler = http_handler(exercise, tenant)
+    return lambda: HttpProtocol(handler, HTTP_KEEPALIVE)
+
+
+EXERCISES = ("http-get", "http-auth", "echo")
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from collections import namedtuple
+from http import HTTPStatus
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 16 * 1024  # Requests with a longer head are answered 431
+MAX_BODY_BYTES = 64 * 1024  # And with a longer body 413; the exercises never need one
+
+Request = namedtuple("Request", "method path headers peer")
+
+
+def render_response(status, headers, body=b"", keep_alive=True, version="HTTP/1.1"):
+    """The bytes of an HTTP/1.1 response; ``headers`` is a list of (name, value).
+
+    ``version`` is the request's; an HTTP/1.0 client is told when the connection stays open.
+    """
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    lines.append(f"Content-Length: {len(body)}")
+    if not keep_alive:
+        lines.append("Connection: close")
+    elif version == "HTTP/1.0":
+        lines.append("Connection: keep-alive")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+class HttpProtocol(asyncio.Protocol):
+    """A small HTTP/1.1 server connection: keep-alive, pipelining and Content-Length bodies.
+
+    Every complete request is passed to ``handler(request)``, which returns
+    ``(status, headers, body)``. That is all the exercise routes need, and it costs a few
+    hundred bytes per idle tenant instead of a web framework per tenant.
+    """
+
+    def __init__(self, handler, keepalive):
+        self.handler = handler
+        self.keepalive = keepalive
+        self.transport = None
+        self.peer = None
+        self._buffer = bytearray()
+        self._idle_timer = None
+        self._last_activity = 0.0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.peer = transport.get_extra_info("peername")
+        loop = asyncio.get_running_loop()
+        self._last_activity = loop.time()
+        self._idle_timer = loop.call_later(self.keepalive, self._check_idle)
+
+    def data_received(self, data):
+        self._last_activity = asyncio.get_running_loop().time()
+        self._buffer += data
+        while self.transport is not None and not self.transport.is_closing():
+            end = self._buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self._buffer) > MAX_HEADER_BYTES:
+                    self._fail(431)
+                return
+            try:
+                method, path, version, headers = _parse_head(bytes(self._buffer[:end]))
+                length = _content_length(headers)
+            except ValueError:
+                self._fail(400)
+                return
+            if "transfer-encoding" in headers:
+                self._fail(411)  # Chunked bodies are not supported
+                return
+            if length > MAX_BODY_BYTES:
+                self._fail(413)
+                return
+            if len(self._buffer) < end + 4 + length:
+                return  # Wait for the rest of the body
+            del self._buffer[:end + 4 + length]
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            try:
+                status, response_headers, body = self.handler(Request(method, path.partition("?")[0],
+                                                                      headers, self.peer))
+            except Exception:
+                logger.exception("Error handling %s %s", method, path)
+                status, response_headers, body = 500, [], b""
+            self.transport.write(render_response(status, response_headers,
+                                                 b"" if method == "HEAD" else body, keep_alive, version))
+            if not keep_alive:
+                self.transport.close()
+
+    def _fail(self, status):
+        self.transport.write(render_response(status, [], keep_alive=False))
+        self.transport.close()
+
+    def _check_idle(self):
+        loop = asyncio.get_running_loop()
+        idle = loop.time() - self._last_activity
+        if idle >= self.keepalive:
+            self.transport.close()
+        else:
+            self._idle_timer = loop.call_later(self.keepalive - idle, self._check_idle)
+
+    def connection_lost(self, exc):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        self.transport = None
+
+
+def _parse_head(head):
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, version = lines[0].split(" ")
+    headers = {}
+    for line in lines[1:]:
+        name, colon, value = line.partition(":")
+        if not colon:
+            raise ValueError(f"Malformed header line {line!r}")
+        name = name.strip().lower()
+        value = value.strip()
+        if name == "content-length" and headers.get(name, value) != value:
+            raise ValueError("Conflicting Content-Length headers")
+        headers[name] = value
+    return method, path, version, headers
+
+
+def _content_length(headers):
+    """The body length; only plain digits are accepted, so not "-10", "+5" or "1_0"."""
+    value = headers.get("content-length", "0")
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError(f"Invalid Content-Length {value!r}")
+    return int(value)
+
+
+class SentinelMatcher:
+    """Finds a byte sentinel in a stream, including when it is split across chunks."""
+
+    def __init__(self, sentinel):
+        self.sentinel = sentinel
+        self._tail = b""  # Last len(sentinel) - 1 bytes seen, to match across chunk boundaries
+
+    def feed(self, data):
+        """Scan ``data``. Returns True once the sentinel was seen."""
+        keep = len(self.sentinel) - 1
+        if self._tail and self.sentinel in self._tail + data[:keep]:
+            return True
+        if self.sentinel in data:
+            return True
+        if keep:
+            self._tail = (self._tail + data)[-keep:] if len(data) < keep else bytes(data[-keep:])
+        return False
+
+
+class EchoProtocol(asyncio.Protocol):
+    """Echoes everything a client sends until it disconnects, sends ``sentinel`` or goes idle.
+
+    Same behavior as Socket-Server, without its per-connection receive buffer: the loop's
+    own read buffer is enough when connections are many and mostly idle.
+    """
+
+    def __init__(self, sentinel, idle_timeout):
+        self._matcher = SentinelMatcher(sentinel)
+        self.idle_timeout = idle_timeout
+        self.transport = None
+        self._idle_timer = None
+        self._last_activity = 0.0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        loop = asyncio.get_running_loop()
+        self._last_activity = loop.time()
+        self._idle_timer = loop.call_later(self.idle_timeout, self._check_idle)
+
+    def data_received(self, data):
+        self._last_activity = asyncio.get_running_loop().time()
+        self.transport.write(data)
+        if self._matcher.feed(data):
+            self.transport.close()  # Sends whatever is still buffered before closing
+
+    def pause_writing(self):
+        # The client is not reading its echoes, stop reading from it until it catches up
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def _check_idle(self):
+        loop = asyncio.get_running_loop()
+        idle = loop.time() - self._last_activity
+        if idle >= self.idle_timeout:
+            self.transport.close()
+        else:
+            self._idle_timer = loop.call_later(self.idle_timeout - idle, self._check_idle)
+
+    def connection_lost(self, exc):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
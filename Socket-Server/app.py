@@ -1,48 +1,141 @@
-import json
-import socket
+import asyncio
+import os
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,  # Set to DEBUG to capture all levels of log messages
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Output to console
-        # Uncomment the next line to also log to a file
-        # logging.FileHandler("/var/log/application.log"),
-    ]
-)
+import metrics
+import profiler
+from logconfig import setup_logging
+from variables import load_variables
+
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_PER_SECOND; see logconfig.py)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 # Configuration
-VARIABLES_FILE = "/variables.txt"  # Ensure the file path is correct
+IDLE_TIMEOUT = float(os.environ.get("IDLE_TIMEOUT", 300))  # Close connections silent for this many seconds
+MAX_CONNECTIONS = int(os.environ.get("MAX_CONNECTIONS", 10000))  # Refuse new clients beyond this many
+LISTEN_BACKLOG = int(os.environ.get("LISTEN_BACKLOG", 1024))  # Pending connections queued by the kernel
+BUFFER_SIZE = int(os.environ.get("BUFFER_SIZE", 16 * 1024))  # Receive buffer preallocated per connection
+SENTINEL = b"Bye bye"  # The server closes the connection after echoing this
+
+# Exposed at :METRICS_PORT/metrics (see metrics.py)
+CONNECTIONS = metrics.REGISTRY.counter("echo_connections_total", "Connections accepted").labels()
+REFUSED = metrics.REGISTRY.counter("echo_connections_refused_total", "Connections refused over MAX_CONNECTIONS").labels()
+ECHOED_BYTES = metrics.REGISTRY.counter("echo_bytes_total", "Bytes received and echoed back").labels()
+CONNECTION_SECONDS = metrics.REGISTRY.histogram(
+    "echo_connection_duration_seconds", "How long connections stayed open",
+    buckets=(0.01, 0.1, 1, 10, 60, 300, 1800, 3600)).labels()
+
+
+class SentinelMatcher:
+    """Finds a byte sentinel in a stream, including when it is split across chunks."""
+
+    def __init__(self, sentinel):
+        self.sentinel = sentinel
+        self._tail = b""  # Last len(sentinel) - 1 bytes seen, to match across chunk boundaries
+
+    def feed(self, buffer, nbytes):
+        """Scan the first ``nbytes`` of ``buffer``. Returns True once the sentinel was seen."""
+        keep = len(self.sentinel) - 1
+        if self._tail and self.sentinel in self._tail + buffer[:min(nbytes, keep)]:
+            return True
+        if buffer.find(self.sentinel, 0, nbytes) != -1:
+            return True
+        if keep:
+            if nbytes >= keep:
+                self._tail = bytes(buffer[nbytes - keep:nbytes])
+            else:
+                self._tail = (self._tail + buffer[:nbytes])[-keep:]
+        return False
+
+
+class EchoProtocol(asyncio.BufferedProtocol):
+    """Echoes everything a client sends until it disconnects, says "Bye bye" or goes idle.
+
+    Data is received straight into a preallocated buffer with recv_into and written back
+    from a memoryview of it, so the payload is never decoded or copied on the way through.
+    """
+
+    open_connections = 0
+
+    def __init__(self):
+        self._buffer = bytearray(BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._matcher = SentinelMatcher(SENTINEL)
+        self.transport = None
+        self.client_address = None
+        self._idle_timer = None
+        self._last_activity = 0.0
+        self._opened_at = 0.0
 
-def load_variables():
-    """Read the variables from the file."""
-    try:
-        with open(VARIABLES_FILE, "r") as f:
-            # Read the raw content
-            raw_content = f.read().strip()
+    def connection_made(self, transport):
+        self.transport = transport
+        self.client_address = transport.get_extra_info("peername")
+        if EchoProtocol.open_connections >= MAX_CONNECTIONS:
+            logger.warning("Too many connections (%s), refusing %s", EchoProtocol.open_connections, self.client_address)
+            REFUSED.inc()
+            transport.abort()
+            return
 
-            # Preprocess the content to make it valid JSON
-            if not raw_content.startswith("{") or not raw_content.endswith("}"):
-                raise ValueError("Invalid JSON format in the file.")
+        EchoProtocol.open_connections += 1
+        CONNECTIONS.inc()
+        logger.info("Connection established with %s", self.client_address)
+        loop = asyncio.get_running_loop()
+        self._last_activity = self._opened_at = loop.time()
+        self._idle_timer = loop.call_later(IDLE_TIMEOUT, self._check_idle)
 
-            # Convert to valid JSON format: Add double quotes around keys and values
-            json_content = raw_content.replace("{", '{"').replace("}", '"}').replace(":", '":"').replace(",", '","')
+    def get_buffer(self, sizehint):
+        return self._view
 
-            # Deserialize the JSON string into a Python dictionary
-            file_content = json.loads(json_content)
-            logger.debug(f"Variables file content: {file_content}")
-            return file_content
-    except FileNotFoundError:
-        logger.error(f"Error: {VARIABLES_FILE} not found.")
-        return None
-    except Exception as e:
-        logger.error(f"Unexpected error while reading {VARIABLES_FILE}: {e}")
-        return None
+    def buffer_updated(self, nbytes):
+        self._last_activity = asyncio.get_running_loop().time()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received %s bytes from %s", nbytes, self.client_address)
+        ECHOED_BYTES.inc(nbytes)
 
+        self.transport.write(self._view[:nbytes])  # Echo data back to client
+        if self._matcher.feed(self._buffer, nbytes):
+            logger.info("Closing connection with %s", self.client_address)
+            self.transport.close()  # Sends whatever is still buffered before closing
+        elif self.transport.get_write_buffer_size():
+            # The transport may still reference the unsent part of our buffer; read into a fresh one
+            self._buffer = bytearray(BUFFER_SIZE)
+            self._view = memoryview(self._buffer)
 
+    def pause_writing(self):
+        # The client is not reading its echoes, stop reading from it until it catches up
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def _check_idle(self):
+        loop = asyncio.get_running_loop()
+        idle = loop.time() - self._last_activity
+        if idle >= IDLE_TIMEOUT:
+            logger.info("Closing idle connection with %s", self.client_address)
+            self.transport.close()
+        else:
+            self._idle_timer = loop.call_later(IDLE_TIMEOUT - idle, self._check_idle)
+
+    def connection_lost(self, exc):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            EchoProtocol.open_connections -= 1
+            CONNECTION_SECONDS.observe(asyncio.get_running_loop().time() - self._opened_at)
+        if exc is not None:
+            logger.debug("Connection with %s lost: %s", self.client_address, exc)
+
+
+metrics.REGISTRY.gauge("echo_open_connections", "Connections open now", lambda: EchoProtocol.open_connections)
+
+
+async def serve(host, port):
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(EchoProtocol, host, port, reuse_address=True, backlog=LISTEN_BACKLOG)
+    logger.info("Server is running on %s:%s", host, port)
+    async with server:
+        await server.serve_forever()
 
 
 def main():
@@ -50,27 +143,13 @@ def main():
     HOST = "0.0.0.0"
     PORT = int(variables.get("port"))
 
-    logger.debug(f" retrieved Host: {HOST}, Port: {PORT}")
-
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # Reuse address
-        server_socket.bind((HOST, PORT))
-        server_socket.listen(5)
-        print(f"Server is running on {HOST}:{PORT}")
-
-        while True:
-            client_socket, client_address = server_socket.accept()
-            print(f"Connection established with {client_address}")
-
-            with client_socket:
-                while True:
-                    data = client_socket.recv(1024)
-                    if not data:
-                        break
-                    print(f"Received from {client_address}: {data.decode()}")
-                    client_socket.sendall(data)  # Echo data back to client
-                    if "Bye bye" in data.decode():
-                        print(f"Closing connection with {client_address}")
-                        break
+    logger.debug(" retrieved Host: %s, Port: %s", HOST, PORT)
+
+    metrics.serve(routes={"/debug/profile": profiler.admin_route})
+    profiler.install_signal_handler()
+
+    asyncio.run(serve(HOST, PORT))
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,147 @@
+"""Load test for the Socket-Server echo service.
+
+Opens ``--connections`` client connections as fast as possible (a connection storm), then
+has every client send ``--messages`` echo round trips of ``--size`` bytes and finish with
+"Bye bye". Prints connections per second and echo latency percentiles.
+
+With ``--bulk-mb`` every connection instead streams that many megabytes while reading the
+echo back concurrently, and the total echo throughput is printed in MB/s.
+
+    python benchmarks/echo_load.py --spawn --connections 2000 --messages 20
+    python benchmarks/echo_load.py --spawn --connections 4 --bulk-mb 256
+    python benchmarks/echo_load.py --host 10.0.0.5 --port 5007
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Socket-Server")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def spawn_server(port):
+    """Start the Socket-Server event loop on localhost in a subprocess."""
+    code = f"import asyncio, app; asyncio.run(app.serve('127.0.0.1', {port}))"
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=SERVER_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    return proc
+
+
+async def run(args):
+    payload = b"x" * max(args.size - 1, 0) + b"\n"
+    connect_slots = asyncio.Semaphore(args.connect_concurrency)
+    failures = 0
+
+    async def connect():
+        nonlocal failures
+        async with connect_slots:
+            try:
+                return await asyncio.open_connection(args.host, args.port)
+            except OSError:
+                failures += 1
+                return None
+
+    started = time.perf_counter()
+    connections = [conn for conn in await asyncio.gather(*(connect() for _ in range(args.connections))) if conn]
+    connect_elapsed = time.perf_counter() - started
+
+    if args.bulk_mb:
+        await run_bulk(connections, args.bulk_mb)
+        return
+
+    latencies = []
+
+    async def session(reader, writer):
+        try:
+            for _ in range(args.messages):
+                sent = time.perf_counter()
+                writer.write(payload)
+                await writer.drain()
+                await reader.readexactly(len(payload))
+                latencies.append(time.perf_counter() - sent)
+            writer.write(b"Bye bye")
+            await writer.drain()
+            await reader.read()  # Server echoes and then closes
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(reader, writer) for reader, writer in connections))
+    echo_elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"connections: {len(connections)} opened, {failures} failed, "
+          f"{len(connections) / connect_elapsed:,.0f} conn/s")
+    print(f"echoes:      {len(latencies)} in {echo_elapsed:.2f}s, {len(latencies) / echo_elapsed:,.0f} msg/s")
+    print(f"latency:     p50 {percentile(latencies, 0.50) * 1000:.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms  max {latencies[-1] * 1000 if latencies else 0:.2f} ms")
+
+
+async def run_bulk(connections, megabytes):
+    chunk = b"x" * (64 * 1024)
+    total = megabytes * 1024 * 1024
+
+    async def stream(reader, writer):
+        async def send():
+            for _ in range(total // len(chunk)):
+                writer.write(chunk)
+                await writer.drain()
+
+        async def receive():
+            received = 0
+            while received < total:
+                data = await reader.read(1024 * 1024)
+                if not data:
+                    break
+                received += len(data)
+            return received
+
+        try:
+            _, received = await asyncio.gather(send(), receive())
+            writer.write(b"Bye bye")
+            await writer.drain()
+            return received
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    received = sum(await asyncio.gather(*(stream(reader, writer) for reader, writer in connections)))
+    elapsed = time.perf_counter() - started
+    print(f"bulk:        {received / 1e6:,.0f} MB echoed over {len(connections)} connections "
+          f"in {elapsed:.2f}s, {received / 1e6 / elapsed:,.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=15007)
+    parser.add_argument("--spawn", action="store_true", help="start Socket-Server/app.py on --port first")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--connect-concurrency", type=int, default=500, help="connects in flight at once")
+    parser.add_argument("--messages", type=int, default=10, help="echo round trips per connection")
+    parser.add_argument("--size", type=int, default=64, help="bytes per message")
+    parser.add_argument("--bulk-mb", type=int, default=0, help="stream this many MB per connection instead")
+    args = parser.parse_args()
+
+    proc = spawn_server(args.port) if args.spawn else None
+    try:
+        asyncio.run(run(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Local stand-in for the ClientEvaluation API that the Http-Get-Client reports to.
+
+Answers GET /api/ClientEvaluation/<exercise>/<container_id>/<ip> with 200, after an optional
+delay and with an optional failure rate, and prints how many reports it received.
+
+    python benchmarks/evaluation_stub.py --port 3000 --latency 0.2 --fail 0.1
+"""
+import argparse
+import asyncio
+import random
+
+from aiohttp import web
+
+
+def make_app(latency, fail_rate):
+    received = {"total": 0, "failed": 0, "unique": set()}
+
+    async def evaluate(request):
+        if latency:
+            await asyncio.sleep(latency)
+        received["total"] += 1
+        if random.random() < fail_rate:
+            received["failed"] += 1
+            return web.Response(status=503, text="Unavailable")
+        info = request.match_info
+        received["unique"].add((info["container_id"], info["ip"]))
+        return web.Response(text="Evaluation recorded")
+
+    async def report(app):
+        while True:
+            await asyncio.sleep(5)
+            print(f"received {received['total']} reports ({received['failed']} failed on purpose, "
+                  f"{len(received['unique'])} unique students)", flush=True)
+
+    async def start_report(app):
+        app["report_task"] = asyncio.create_task(report(app))
+
+    app = web.Application()
+    app.router.add_get("/api/ClientEvaluation/{exercise}/{container_id}/{ip}", evaluate)
+    app.on_startup.append(start_report)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay before answering, in seconds")
+    parser.add_argument("--fail", type=float, default=0.0, help="fraction of reports answered with 503")
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency, args.fail), host="0.0.0.0", port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Provisioning and tearing down users one RPC at a time versus in batches.
+
+Starts the gRPC server in a subprocess, then creates and deletes ``--users`` users three
+ways: one CreateUser/DeleteUser call per user, BatchCreateUsers/BatchDeleteUsers with
+``--batch-size`` users per call, and a single client-streaming ImportUsers call (deleted
+in batches). Prints round trips and users per second for each.
+
+    python benchmarks/grpc_batch.py --users 10000 --batch-size 500
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gRCP-server")
+sys.path.insert(0, SERVER_DIR)
+
+import grpc  # noqa: E402
+
+import service_pb2  # noqa: E402
+import service_pb2_grpc  # noqa: E402
+
+
+def requests_for(prefix, count):
+    return [service_pb2.CreateUserRequest(name=f"Student {i}", email=f"{prefix}{i}@example.com")
+            for i in range(count)]
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def unary(stub, requests, batch_size):
+    ids = [stub.CreateUser(request).user.id for request in requests]
+    created = time.perf_counter()
+    for user_id in ids:
+        stub.DeleteUser(service_pb2.DeleteUserRequest(id=user_id))
+    return created, len(requests), len(ids)
+
+
+def batch(stub, requests, batch_size):
+    ids = []
+    for chunk in chunks(requests, batch_size):
+        response = stub.BatchCreateUsers(service_pb2.BatchCreateUsersRequest(requests=chunk))
+        ids.extend(result.user.id for result in response.results if result.code == 0)
+    created = time.perf_counter()
+    for chunk in chunks(ids, batch_size):
+        stub.BatchDeleteUsers(service_pb2.BatchDeleteUsersRequest(ids=chunk))
+    return created, len(chunks(requests, batch_size)), len(chunks(ids, batch_size))
+
+
+def stream(stub, requests, batch_size):
+    response = stub.ImportUsers(iter(requests))
+    created = time.perf_counter()
+    assert response.created == len(requests), response.errors[:3]
+    ids = []
+    token = ""
+    while True:  # Imported ids are not returned, so page through them to delete
+        page = stub.ListUsers(service_pb2.ListUsersRequest(page_size=batch_size, page_token=token))
+        ids.extend(user.id for user in page.users)
+        token = page.next_page_token
+        if not token:
+            break
+    for chunk in chunks(ids, batch_size):
+        stub.BatchDeleteUsers(service_pb2.BatchDeleteUsersRequest(ids=chunk))
+    return created, 1, 2 * len(chunks(ids, batch_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--port", type=int, default=15015)
+    args = parser.parse_args()
+
+    env = dict(os.environ, GRPC_PORT=str(args.port))
+    proc = subprocess.Popen([sys.executable, "app.py"], cwd=SERVER_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    channel = grpc.insecure_channel(f"127.0.0.1:{args.port}")
+    try:
+        grpc.channel_ready_future(channel).result(timeout=30)
+        stub = service_pb2_grpc.UserServiceStub(channel)
+        for name, provision in (("unary", unary), ("batch", batch), ("import", stream)):
+            requests = requests_for(name, args.users)
+            started = time.perf_counter()
+            created, create_calls, delete_calls = provision(stub, requests, args.batch_size)
+            finished = time.perf_counter()
+            print(f"{name:>6}  create {args.users / (created - started):10,.0f} users/s in {create_calls:>6} calls  "
+                  f"delete {args.users / (finished - created):10,.0f} users/s in {delete_calls:>6} calls")
+    finally:
+        channel.close()
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Thread-pool versus asyncio (grpc.aio) gRPC server at high client concurrency.
+
+For each ``--modes`` entry the gRPC server is started in a subprocess with that
+GRPC_SERVER_MODE. ``--concurrency`` asyncio clients, spread over ``--channels`` channels,
+then keep one RPC each in flight for ``--duration`` seconds: about 20% CreateUser and
+80% GetUser of a user created earlier. Prints RPCs per second, p50/p99 latency, errors and
+the server's CPU time per thousand RPCs (which matters when clients share its cores).
+
+    python benchmarks/grpc_modes.py --modes threads aio --concurrency 500 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gRCP-server")
+sys.path.insert(0, SERVER_DIR)
+
+import grpc  # noqa: E402
+
+import service_pb2  # noqa: E402
+import service_pb2_grpc  # noqa: E402
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+async def load(port, concurrency, channels, duration):
+    channels = [grpc.aio.insecure_channel(f"127.0.0.1:{port}") for _ in range(channels)]
+    stubs = [service_pb2_grpc.UserServiceStub(channel) for channel in channels]
+    for channel in channels:
+        await asyncio.wait_for(channel.channel_ready(), 30)
+
+    seed = await stubs[0].BatchCreateUsers(service_pb2.BatchCreateUsersRequest(requests=[
+        service_pb2.CreateUserRequest(name="seed", email="") for _ in range(1000)]))
+    ids = [result.user.id for result in seed.results]
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(index):
+        nonlocal errors
+        stub = stubs[index % len(stubs)]
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if rng.random() < 0.2:
+                    await stub.CreateUser(service_pb2.CreateUserRequest(name="bench", email=""))
+                else:
+                    await stub.GetUser(service_pb2.GetUserRequest(id=rng.choice(ids)))
+            except grpc.aio.AioRpcError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    for channel in channels:
+        await channel.close()
+
+    latencies.sort()
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=["threads", "aio"], default=["threads", "aio"])
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=15015)
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        env = dict(os.environ, GRPC_PORT=str(args.port), GRPC_SERVER_MODE=mode)
+        proc = subprocess.Popen([sys.executable, "app.py"], cwd=SERVER_DIR, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            rps, p50, p99, errors = asyncio.run(load(args.port, args.concurrency, args.channels, args.duration))
+        finally:
+            proc.terminate()
+            _, _, usage = os.wait4(proc.pid, 0)
+            proc.returncode = 0
+        cpu_ms = (usage.ru_utime + usage.ru_stime) * 1000 / (rps * args.duration / 1000)
+        print(f"{mode:>8}  {rps:10,.0f} RPC/s  p50 {p50 * 1000:8.2f} ms  p99 {p99 * 1000:8.2f} ms  "
+              f"{errors} errors  server CPU {cpu_ms:.0f} ms/1k RPCs")
+
+
+if __name__ == "__main__":
+    main()
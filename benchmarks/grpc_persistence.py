@@ -0,0 +1,120 @@
+"""Write throughput and recovery time of the gRPC user store's journal.
+
+Runs against UserStore and Journal directly (no RPCs) in a temporary directory:
+
+1. bulk load: ``--users`` users added with add_many() in batches of ``--batch-size``;
+2. concurrent writers: ``--threads`` threads each calling add() for ``--duration``
+   seconds, with JOURNAL_SYNC "always" and "interval", reporting records per fsync;
+3. recovery from the log alone, then from a snapshot plus a ``--tail`` record log.
+
+    python benchmarks/grpc_persistence.py --users 1000000 --threads 16
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gRCP-server")
+sys.path.insert(0, SERVER_DIR)
+
+import service_pb2  # noqa: E402
+from journal import Journal  # noqa: E402
+from store import UserStore  # noqa: E402
+
+
+def make_users(prefix, count):
+    return [service_pb2.User(id=str(uuid.uuid4()), name=f"Student {i}", email=f"{prefix}{i}@example.com")
+            for i in range(count)]
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def bulk_load(directory, users, batch_size):
+    journal = Journal(directory, snapshot_bytes=1 << 62)
+    store = UserStore(journal)
+    started = time.perf_counter()
+    for i in range(0, len(users), batch_size):
+        store.add_many(users[i:i + batch_size])
+    elapsed = time.perf_counter() - started
+    journal.close()
+    print(f"bulk load:      {len(users):,} users in {elapsed:.2f}s, {len(users) / elapsed:,.0f} users/s, "
+          f"{journal.flushes:,} fsyncs, log {directory_size(directory) / 1e6:,.1f} MB")
+    return store, journal
+
+
+def concurrent_writers(directory, threads, duration, sync):
+    journal = Journal(directory, sync=sync, snapshot_bytes=1 << 62)
+    store = UserStore(journal)
+    flushes_before = journal.flushes
+    counts = [0] * threads
+    deadline = time.perf_counter() + duration
+
+    def writer(index):
+        serial = 0
+        while time.perf_counter() < deadline:
+            serial += 1
+            store.add(service_pb2.User(id=str(uuid.uuid4()), name="writer", email=f"w{index}-{serial}@example.com"))
+            counts[index] += 1
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    journal.close()
+    writes = sum(counts)
+    flushes = max(journal.flushes - flushes_before, 1)
+    mode = "always" if sync else "interval"
+    print(f"writers {mode:>8}: {threads} threads, {writes / elapsed:,.0f} adds/s, "
+          f"{writes / flushes:,.1f} records per flush")
+
+
+def recover(directory, label):
+    started = time.perf_counter()
+    journal = Journal(directory, snapshot_bytes=1 << 62)
+    store = UserStore(journal)
+    elapsed = time.perf_counter() - started
+    print(f"recovery {label}: {len(store):,} users in {elapsed:.2f}s")
+    return store, journal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--tail", type=int, default=100000, help="log records after the snapshot")
+    parser.add_argument("--dir", default=None, help="directory to write in (default: a temporary one)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="journal-bench-", dir=args.dir)
+    try:
+        for sync in (True, False):
+            scratch = os.path.join(directory, f"writers-{sync}")
+            concurrent_writers(scratch, args.threads, args.duration, sync)
+
+        data = os.path.join(directory, "users")
+        bulk_load(data, make_users("bulk", args.users), args.batch_size)
+        store, journal = recover(data, "(log only)       ")
+
+        journal.snapshot()
+        store.add_many(make_users("tail", args.tail))
+        journal.close()
+        del store, journal
+        recover(data, "(snapshot + tail)")[1].close()
+        print(f"on disk:        {directory_size(data) / 1e6:,.1f} MB")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
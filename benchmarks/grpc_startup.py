@@ -0,0 +1,96 @@
+"""Cold start and idle memory of the gRPC server, with regression limits.
+
+Measures, as the median of ``--runs`` fresh processes:
+
+- import time: ``import app`` in a new interpreter (everything a start loads);
+- first RPC: from spawning ``python app.py`` until a GetUser call is answered;
+- idle RSS: resident memory of that server once it has answered.
+
+Exits with status 1 if any median is above its ``--max-*`` limit, so it can guard a
+build against regressions such as a framework being imported again.
+
+    python benchmarks/grpc_startup.py --runs 5 --max-import-ms 200 --max-rss-mb 45
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gRCP-server")
+sys.path.insert(0, SERVER_DIR)
+
+import grpc  # noqa: E402
+
+import service_pb2  # noqa: E402
+import service_pb2_grpc  # noqa: E402
+
+
+def import_time(env):
+    code = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=SERVER_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def rss_bytes(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def first_rpc(env, port):
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "app.py"], cwd=SERVER_DIR, env=dict(env, GRPC_PORT=str(port)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # Retry connecting every few ms instead of gRPC's default backoff of a second or more
+        options = [("grpc.initial_reconnect_backoff_ms", 5), ("grpc.min_reconnect_backoff_ms", 5),
+                   ("grpc.max_reconnect_backoff_ms", 20)]
+        with grpc.insecure_channel(f"127.0.0.1:{port}", options=options) as channel:
+            stub = service_pb2_grpc.UserServiceStub(channel)
+            try:
+                stub.GetUser(service_pb2.GetUserRequest(id="probe"), wait_for_ready=True, timeout=30)
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.NOT_FOUND:  # NOT_FOUND is an answer
+                    raise
+        elapsed = time.perf_counter() - started
+        time.sleep(0.5)
+        return elapsed, rss_bytes(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=15015)
+    parser.add_argument("--max-import-ms", type=float, default=200.0)
+    parser.add_argument("--max-first-rpc-ms", type=float, default=1000.0)
+    parser.add_argument("--max-rss-mb", type=float, default=45.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("PERSIST_DIR", None)
+    imports = [import_time(env) * 1000 for _ in range(args.runs)]
+    starts = [first_rpc(env, args.port) for _ in range(args.runs)]
+    results = [
+        ("import time", statistics.median(imports), "ms", args.max_import_ms),
+        ("first RPC", statistics.median(s[0] * 1000 for s in starts), "ms", args.max_first_rpc_ms),
+        ("idle RSS", statistics.median(s[1] / 1e6 for s in starts), "MB", args.max_rss_mb),
+    ]
+
+    failed = False
+    for name, value, unit, limit in results:
+        over = value > limit
+        failed |= over
+        print(f"{name:<12} {value:8.1f} {unit}  (limit {limit:g} {unit}){'  REGRESSION' if over else ''}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
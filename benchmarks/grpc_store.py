@@ -0,0 +1,99 @@
+"""Mixed CreateUser/GetUser/DeleteUser throughput of the gRPC UserService by worker count.
+
+For each value of ``--workers`` the gRPC server is started in a subprocess with that many
+GRPC_MAX_WORKERS threads, then ``--clients`` threads issue a mix of about 25% CreateUser,
+50% GetUser and 25% DeleteUser calls for ``--duration`` seconds. A ListUsers caller runs
+alongside them so snapshot reads are exercised under write load.
+
+    python benchmarks/grpc_store.py --workers 1 2 4 10 32 --clients 32 --duration 5
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gRCP-server")
+sys.path.insert(0, SERVER_DIR)
+
+import grpc  # noqa: E402
+
+import service_pb2  # noqa: E402
+import service_pb2_grpc  # noqa: E402
+
+
+def start_server(port, workers):
+    env = dict(os.environ, GRPC_PORT=str(port), GRPC_MAX_WORKERS=str(workers))
+    proc = subprocess.Popen([sys.executable, "app.py"], cwd=SERVER_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    grpc.channel_ready_future(channel).result(timeout=30)
+    return proc, channel
+
+
+def run(channel, clients, duration):
+    stub = service_pb2_grpc.UserServiceStub(channel)
+    deadline = time.perf_counter() + duration
+    counts = [0] * clients
+    errors = [0] * clients
+    lists = 0
+
+    def client(index):
+        rng = random.Random(index)
+        own = []  # Ids this client created and has not deleted yet
+        serial = 0
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            try:
+                if roll < 0.25 or not own:
+                    serial += 1
+                    email = f"user{index}-{serial}@example.com"
+                    own.append(stub.CreateUser(service_pb2.CreateUserRequest(name="bench", email=email)).user.id)
+                elif roll < 0.75:
+                    stub.GetUser(service_pb2.GetUserRequest(id=rng.choice(own)))
+                else:
+                    stub.DeleteUser(service_pb2.DeleteUserRequest(id=own.pop(rng.randrange(len(own)))))
+            except grpc.RpcError:
+                errors[index] += 1
+            counts[index] += 1
+
+    def lister():
+        nonlocal lists
+        while time.perf_counter() < deadline:
+            stub.ListUsers(service_pb2.ListUsersRequest())
+            lists += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    threads.append(threading.Thread(target=lister))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return sum(counts) / elapsed, sum(errors), lists / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 10, 32])
+    parser.add_argument("--clients", type=int, default=32, help="client threads issuing calls")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=15015)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        proc, channel = start_server(args.port, workers)
+        try:
+            ops, errors, lists = run(channel, args.clients, args.duration)
+        finally:
+            channel.close()
+            proc.terminate()
+            proc.wait()
+        print(f"workers {workers:>3}  {ops:10,.0f} ops/s  {lists:8,.1f} lists/s  {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
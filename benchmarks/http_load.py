@@ -0,0 +1,113 @@
+"""Throughput and latency of the Flask exercise servers in development and production mode.
+
+Starts Http-Get-Server and Http-Post-Auth-Header-Server on localhost, either with Flask's
+development server (``dev``) or with gunicorn and gunicorn.conf.py (``gunicorn``). Each
+route is then hit by ``--concurrency`` keep-alive clients for ``--duration`` seconds.
+
+    python benchmarks/http_load.py --modes dev gunicorn --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SECRET = "benchmark-secret"
+
+# (server directory, port, method, path, headers)
+ROUTES = [
+    ("Http-Get-Server", 15005, "GET", "/", {}),
+    ("Http-Post-Auth-Header-Server", 15010, "POST", "/unlock-treasure", {"Secretkey": SECRET}),
+]
+
+
+def start_server(directory, port, mode, env):
+    cwd = os.path.join(ROOT, directory)
+    env = dict(env, PORT=str(port))
+    if mode == "dev":
+        cmd = [sys.executable, "-c", f"import app; app.app.run(host='127.0.0.1', port={port})"]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    return subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(url, method, headers):
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.request(method, url, headers=headers) as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+async def load(url, method, headers, concurrency, duration):
+    latencies = []
+    errors = 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + duration
+
+        async def client():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    async with session.request(method, url, headers=headers) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] if latencies else 0.0
+    return len(latencies) / elapsed, p99, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=["dev", "gunicorn"], default=["dev", "gunicorn"])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=None, help="gunicorn WEB_WORKERS (default from config)")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write(f"{{secret:{SECRET},port:15010}}")
+    # Every client connects from 127.0.0.1, so lift the per-IP /unlock-treasure rate limit
+    env = dict(os.environ, VARIABLES_FILE=f.name, LOG_LEVEL="WARNING", UNLOCK_RATE="1e9", UNLOCK_BURST="1000000")
+    if args.workers:
+        env["WEB_WORKERS"] = str(args.workers)
+
+    try:
+        for mode in args.modes:
+            for directory, port, method, path, headers in ROUTES:
+                proc = start_server(directory, port, mode, env)
+                url = f"http://127.0.0.1:{port}{path}"
+                try:
+                    asyncio.run(wait_ready(url, method, headers))
+                    rps, p99, errors = asyncio.run(load(url, method, headers, args.concurrency, args.duration))
+                finally:
+                    proc.terminate()
+                    proc.wait()
+                print(f"{mode:>8}  {method:<4} {path:<17} {rps:10,.0f} req/s  p99 {p99 * 1000:8.2f} ms  "
+                      f"{errors} errors")
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Throughput of the sharded Http-Get-Client prober against local dummy servers.
+
+The fake fleet (one address per host on 127.x, see probe_sweep.py) is served by several
+processes sharing the port with SO_REUSEPORT, so it is not the bottleneck. For each shard
+count the hosts are split with the same consistent hash ring the coordinator uses, every
+shard process sweeps its share over and over for ``--duration`` seconds, and the total
+probes per second are printed. Throughput should grow close to linearly with shards as long
+as there are free cores.
+
+    python benchmarks/probe_shards.py --hosts 2000 --shards 1 2 4 --duration 10
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+CLIENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Http-Get-Client")
+sys.path.insert(0, CLIENT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from probe_sweep import RESPONSE, fleet_ips  # noqa: E402
+from sharding import HashRing  # noqa: E402
+
+
+def serve_fleet(port):
+    async def handle(reader, writer):
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("0.0.0.0", port))
+        server = await asyncio.start_server(handle, sock=sock, backlog=4096)
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def run_shard(ips, port, concurrency, duration, results):
+    sys.path.insert(0, CLIENT_DIR)
+    from pool import ConnectionPool
+    from probe_sweep import sweep
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    async def main():
+        probes = 0
+        async with ConnectionPool(limit=concurrency, limit_per_host=1) as pool:
+            started = time.monotonic()
+            while time.monotonic() - started < duration:
+                await sweep(pool.session, ips, port, concurrency, 5)
+                probes += len(ips)
+            return probes, time.monotonic() - started
+
+    results.put(asyncio.run(main()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds each shard count runs")
+    parser.add_argument("--concurrency", type=int, default=200, help="probes in flight per shard")
+    parser.add_argument("--fleet-procs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=18081)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    fleet = [ctx.Process(target=serve_fleet, args=(args.port,), daemon=True) for _ in range(args.fleet_procs)]
+    for proc in fleet:
+        proc.start()
+    time.sleep(1)
+
+    ips = fleet_ips(args.hosts)
+    print(f"{args.hosts} hosts, {os.cpu_count()} cores, fleet served by {args.fleet_procs} processes")
+    baseline = None
+    try:
+        for shards in args.shards:
+            groups = HashRing(range(shards)).split(ips)
+            results = ctx.Queue()
+            procs = [ctx.Process(target=run_shard,
+                                 args=(groups.get(index, []), args.port, args.concurrency, args.duration, results))
+                     for index in range(shards)]
+            for proc in procs:
+                proc.start()
+            # Each shard times its own loop, so process start-up is not counted
+            measured = [results.get() for _ in procs]
+            for proc in procs:
+                proc.join()
+
+            total = sum(probes for probes, _ in measured)
+            rate = sum(probes / elapsed for probes, elapsed in measured)
+            baseline = baseline or rate
+            print(f"{shards:>3} shards  {total:>9} probes  {rate:10.0f} probes/s  x{rate / baseline:.2f}")
+    finally:
+        for proc in fleet:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
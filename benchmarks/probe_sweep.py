@@ -0,0 +1,126 @@
+"""Fake-fleet benchmark for the Http-Get-Client probe engine.
+
+A single local listener answers on every 127.x.y.z address, so each address acts as one student
+host. A fraction of the hosts never answer (like a dead student container) and force the probe to
+hit its deadline. The benchmark prints how long one full sweep takes as the host count grows.
+A sweep probes every host once through the client's own engine: ProbeScheduler running
+probe_host over the ConnectionPool.
+
+    python benchmarks/probe_sweep.py --hosts 10 100 300 1000 --dead 0.1 --deadline 2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Http-Get-Client"))
+
+from pool import ConnectionPool  # noqa: E402
+from prober import probe_host  # noqa: E402
+from scheduler import ProbeScheduler  # noqa: E402
+
+RESPONSE = (b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 17\r\n"
+            b"Connection: keep-alive\r\n\r\n{\"status\": \"ok\"}\n")
+
+
+def fleet_ips(count):
+    """Return ``count`` distinct loopback addresses, starting at 127.0.1.1."""
+    return [f"127.0.{1 + i // 250}.{1 + i % 250}" for i in range(count)]
+
+
+async def start_fleet(port, dead_ips, latency):
+    """Start one listener that plays every host; hosts in ``dead_ips`` never answer."""
+
+    async def handle(reader, writer):
+        host = writer.get_extra_info("sockname")[0]
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                if host in dead_ips:
+                    await asyncio.sleep(3600)
+                if latency:
+                    await asyncio.sleep(latency)
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "0.0.0.0", port, backlog=4096)
+
+
+async def sweep(session, ips, port, concurrency, deadline):
+    """Probe each of ``ips`` once through a ProbeScheduler and return how many answered 200."""
+    successes = 0
+    pending = len(ips)
+    finished = asyncio.Event()
+
+    async def probe(ip):
+        nonlocal successes, pending
+        ok = await probe_host(session, ip, port, deadline)
+        successes += ok
+        pending -= 1
+        if not pending:
+            finished.set()
+        return None  # Once is enough
+
+    scheduler = ProbeScheduler(probe, concurrency)
+    for ip in ips:
+        scheduler.schedule(ip, 0)
+    task = asyncio.create_task(scheduler.run())
+    try:
+        if pending:
+            await finished.wait()
+    finally:
+        task.cancel()
+    return successes
+
+
+async def run(args):
+    for count in args.hosts:
+        ips = fleet_ips(count)
+        dead_ips = set(ips[:int(count * args.dead)])
+        server = await start_fleet(args.port, dead_ips, args.latency)
+
+        async with ConnectionPool(limit=args.concurrency, limit_per_host=1) as pool:
+            started = time.monotonic()
+            successes = await sweep(pool.session, ips, args.port, args.concurrency, args.deadline)
+            elapsed = time.monotonic() - started
+            # A second sweep over the same pool reuses the keep-alive connections of live hosts.
+            await sweep(pool.session, ips, args.port, args.concurrency, args.deadline)
+            reuse = pool.stats()
+        server.close()
+        await server.wait_closed()
+
+        # The old client probed hosts one by one, so a sweep cost the sum of all probe times.
+        sequential = len(dead_ips) * args.deadline + (count - len(dead_ips)) * args.latency
+        print(f"{count:>6} hosts  {len(dead_ips):>5} dead  {successes:>6} ok  "
+              f"sweep {elapsed:8.2f}s  (sequential estimate {sequential:8.1f}s)  "
+              f"second sweep reused {reuse['connections_reused']} connections")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--dead", type=float, default=0.1, help="fraction of hosts that never answer")
+    parser.add_argument("--latency", type=float, default=0.05, help="response delay of live hosts, in seconds")
+    parser.add_argument("--deadline", type=float, default=2.0, help="per-host probe deadline, in seconds")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--log-level", default=None,
+                        help="log through the client's logconfig at this level (default: no logging)")
+    args = parser.parse_args()
+
+    if args.log_level:
+        os.environ["LOG_LEVEL"] = args.log_level
+        from logconfig import setup_logging
+        setup_logging()
+    else:
+        logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+"""End-to-end load suite for all five images, with results that can be compared across runs.
+
+Every target runs as a subprocess on localhost and is driven by an open-loop load generator:
+requests are started at a fixed ``--rate`` however slowly earlier ones are answered, and
+each latency is counted from the moment its request was due. A server that stalls therefore
+shows up as latency and dropped requests instead of quietly lowering the offered load.
+
+- http-get:  GET / on Http-Get-Server (gunicorn, or Flask's server with ``--http dev``)
+- http-auth: POST /unlock-treasure with the right key on Http-Post-Auth-Header-Server
+- echo:      ``--size`` byte round trips over ``--connections`` Socket-Server connections
+- grpc:      80% GetUser, 20% CreateUser on gRCP-server
+- client:    Http-Get-Client probing a fake fleet of ``--hosts`` hosts, each every 5 s; its
+             probe rate and latency (bucket upper bounds) are read from its /metrics
+
+For each target the throughput, latency percentiles, errors, dropped requests, server CPU
+per thousand requests and server RSS (all its processes) are printed and written as JSON to
+``--out``. ``--compare`` prints the change between two such files and exits with status 1
+if any throughput fell or p99 latency rose by more than ``--threshold`` percent.
+
+    python benchmarks/suite.py --rate 1000 --duration 10 --out results.json
+    python benchmarks/suite.py --targets echo grpc --rate 5000 --out new.json
+    python benchmarks/suite.py --compare results.json new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, os.path.join(ROOT, "gRCP-server"))
+sys.path.insert(0, os.path.join(ROOT, "Http-Get-Client"))
+
+from probe_sweep import fleet_ips, start_fleet  # noqa: E402
+
+TARGETS = ["http-get", "http-auth", "echo", "grpc", "client"]
+PERCENTILES = [("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999), ("max", 1.0)]
+SECRET = "benchmark-secret"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+CLIENT_CHECK_INTERVAL = 5  # Http-Get-Client probes every host this often
+EVALUATION_PORT = 3000  # Where Http-Get-Client reports successful probes
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def process_tree(pid):
+    """``pid`` and all of its descendants (gunicorn workers, prober shards)."""
+    parents = {}
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            try:
+                with open(f"/proc/{name}/stat") as f:
+                    parents.setdefault(int(f.read().rpartition(")")[2].split()[1]), []).append(int(name))
+            except OSError:
+                pass
+    tree = [pid]
+    for parent in tree:
+        tree.extend(parents.get(parent, []))
+    return tree
+
+
+def usage(pid):
+    """CPU seconds used so far and resident bytes of ``pid`` and its descendants."""
+    cpu = rss = 0
+    for process in process_tree(pid):
+        try:
+            with open(f"/proc/{process}/stat") as f:
+                fields = f.read().rpartition(")")[2].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+            with open(f"/proc/{process}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return cpu, rss
+
+
+class Server:
+    """A target running as a subprocess for the duration of a ``with`` block."""
+
+    def __init__(self, directory, command, env, port):
+        self.directory = directory
+        self.command = command
+        self.env = dict(os.environ, LOG_LEVEL="WARNING", METRICS_PORT="0")
+        self.env.update(env)
+        self.port = port
+        self.proc = None
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(self.command, cwd=os.path.join(ROOT, self.directory), env=self.env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.__exit__()
+                    raise RuntimeError(f"{self.directory} did not start listening on port {self.port}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc_info):
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+    def usage(self):
+        return usage(self.proc.pid)
+
+
+async def open_loop(send, rate, duration, max_outstanding):
+    """Start ``send()`` ``rate`` times a second for ``duration`` seconds, never waiting for replies.
+
+    Returns (sorted latencies of the calls that succeeded, errors, dropped, elapsed seconds).
+    A call is dropped instead of started while ``max_outstanding`` calls are in flight.
+    """
+    latencies = []
+    errors = dropped = outstanding = 0
+    tasks = set()
+
+    async def call(due):
+        nonlocal errors, outstanding
+        try:
+            await send()
+            latencies.append(time.perf_counter() - due)
+        except Exception:
+            errors += 1
+        finally:
+            outstanding -= 1
+
+    started = time.perf_counter()
+    for i in range(int(rate * duration)):
+        due = started + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if outstanding >= max_outstanding:
+            dropped += 1
+            continue
+        outstanding += 1
+        task = asyncio.create_task(call(due))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return latencies, errors, dropped, elapsed
+
+
+async def measure(server, send, args, max_outstanding):
+    """Warm up, then run the open loop and summarize it with the server's CPU and memory."""
+    await open_loop(send, args.rate, args.warmup, max_outstanding)
+    cpu_before, _ = server.usage()
+    latencies, errors, dropped, elapsed = await open_loop(send, args.rate, args.duration, max_outstanding)
+    cpu_after, rss = server.usage()
+    return summarize(len(latencies), errors, dropped, elapsed, cpu_after - cpu_before, rss,
+                     {name: percentile(latencies, fraction) for name, fraction in PERCENTILES})
+
+
+def summarize(completed, errors, dropped, elapsed, cpu, rss, latencies):
+    return {
+        "completed": completed,
+        "errors": errors,
+        "dropped": dropped,
+        "throughput": round(completed / elapsed, 1),
+        "latency_ms": {name: None if value is None else round(value * 1000, 3) for name, value in latencies.items()},
+        "server_cpu_ms_per_1k": round(cpu * 1e6 / completed, 1) if completed else None,
+        "server_rss_mb": round(rss / 1e6, 1),
+    }
+
+
+async def load_http(server, args, method, path, headers):
+    url = f"http://127.0.0.1:{server.port}{path}"
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=args.concurrency)) as session:
+        async def send():
+            async with session.request(method, url, headers=headers) as response:
+                await response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+
+        return await measure(server, send, args, args.concurrency)
+
+
+def run_http(args, directory, method, path, headers, env):
+    port = args.port
+    env = dict(env, PORT=str(port))
+    if args.http == "dev":
+        command = [sys.executable, "-c", f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    with Server(directory, command, env, port) as server:
+        return asyncio.run(load_http(server, args, method, path, headers))
+
+
+def run_http_get(args, workdir):
+    return run_http(args, "Http-Get-Server", "GET", "/", {}, {})
+
+
+def run_http_auth(args, workdir):
+    variables = os.path.join(workdir, "auth-variables.txt")
+    with open(variables, "w") as f:
+        f.write(f"{{secret:{SECRET},port:{args.port}}}")
+    # Every request comes from 127.0.0.1, so lift the per-IP /unlock-treasure rate limit
+    env = {"VARIABLES_FILE": variables, "UNLOCK_RATE": "1e9", "UNLOCK_BURST": "1000000"}
+    return run_http(args, "Http-Post-Auth-Header-Server", "POST", "/unlock-treasure", {"Secretkey": SECRET}, env)
+
+
+async def load_echo(server, args):
+    payload = b"x" * args.size
+    idle = asyncio.Queue()
+    for _ in range(args.connections):
+        idle.put_nowait(await asyncio.open_connection("127.0.0.1", server.port))
+
+    async def send():
+        reader, writer = await idle.get()  # Waiting for a free connection counts as latency
+        try:
+            writer.write(payload)
+            await reader.readexactly(len(payload))
+        finally:
+            idle.put_nowait((reader, writer))
+
+    try:
+        return await measure(server, send, args, args.concurrency)
+    finally:
+        while not idle.empty():
+            idle.get_nowait()[1].close()
+
+
+def run_echo(args, workdir):
+    variables = os.path.join(workdir, "echo-variables.txt")
+    with open(variables, "w") as f:
+        f.write(f"{{port:{args.port}}}")
+    with Server("Socket-Server", [sys.executable, "app.py"], {"VARIABLES_FILE": variables}, args.port) as server:
+        return asyncio.run(load_echo(server, args))
+
+
+async def load_grpc(server, args):
+    import grpc
+    import service_pb2
+    import service_pb2_grpc
+
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{server.port}") as channel:
+        stub = service_pb2_grpc.UserServiceStub(channel)
+        seed = await stub.BatchCreateUsers(service_pb2.BatchCreateUsersRequest(requests=[
+            service_pb2.CreateUserRequest(name="seed", email="") for _ in range(1000)]))
+        ids = [result.user.id for result in seed.results]
+        rng = random.Random(0)
+
+        async def send():
+            if rng.random() < 0.2:
+                await stub.CreateUser(service_pb2.CreateUserRequest(name="bench", email=""))
+            else:
+                await stub.GetUser(service_pb2.GetUserRequest(id=rng.choice(ids)))
+
+        return await measure(server, send, args, args.concurrency)
+
+
+def run_grpc(args, workdir):
+    env = {"GRPC_PORT": str(args.port), "GRPC_SERVER_MODE": args.grpc_mode, "PERSIST_DIR": ""}
+    with Server("gRCP-server", [sys.executable, "app.py"], env, args.port) as server:
+        return asyncio.run(load_grpc(server, args))
+
+
+def parse_metrics(text):
+    """{sample with labels: value} from a Prometheus text exposition."""
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            sample, _, value = line.rpartition(" ")
+            values[sample] = float(value)
+    return values
+
+
+def histogram_quantiles(before, after, name):
+    """Latency percentiles (the upper bound of the bucket they fall in) between two scrapes."""
+    buckets = []
+    for sample, value in after.items():
+        if sample.startswith(f"{name}_bucket{{le="):
+            bound = float(sample.partition('le="')[2].rstrip('"}'))
+            buckets.append((bound, value - before.get(sample, 0)))
+    buckets.sort()
+    total = buckets[-1][1] if buckets else 0
+    quantiles = {}
+    for label, fraction in PERCENTILES:
+        bound = next((bound for bound, count in buckets if count >= total * fraction), None) if total else 0.0
+        quantiles[label] = bound if bound != float("inf") else None
+    return quantiles
+
+
+async def load_client(server, args, metrics_port):
+    url = f"http://127.0.0.1:{metrics_port}/metrics"
+    async with aiohttp.ClientSession() as session:
+        async def scrape():
+            async with session.get(url) as response:
+                return parse_metrics(await response.text())
+
+        # Hosts are spread over the first check interval; measure once they are all on schedule
+        await asyncio.sleep(max(args.warmup, CLIENT_CHECK_INTERVAL))
+        before, (cpu_before, _) = await scrape(), server.usage()
+        started = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        after, (cpu_after, rss) = await scrape(), server.usage()
+        elapsed = time.perf_counter() - started
+
+    def delta(sample):
+        return int(after.get(sample, 0) - before.get(sample, 0))
+
+    completed = delta('probes_total{result="success"}')
+    errors = delta('probes_total{result="failure"}')
+    return summarize(completed, errors, 0, elapsed, cpu_after - cpu_before, rss,
+                     histogram_quantiles(before, after, "probe_duration_seconds"))
+
+
+async def drive_client(args, workdir):
+    fleet = await start_fleet(args.port, set(), 0)
+
+    async def evaluate(request):
+        return web.Response(text="Evaluation recorded")
+
+    app = web.Application()
+    app.router.add_get("/api/ClientEvaluation/{exercise}/{container_id}/{ip}", evaluate)
+    evaluation = web.AppRunner(app)
+    await evaluation.setup()
+    try:
+        await web.TCPSite(evaluation, "0.0.0.0", EVALUATION_PORT).start()
+    except OSError:
+        print(f"client: port {EVALUATION_PORT} is taken, reports to the evaluation API will fail", file=sys.stderr)
+
+    users = os.path.join(workdir, "users_ip.txt")
+    with open(users, "w") as f:
+        f.writelines(f"{ip},{i}\n" for i, ip in enumerate(fleet_ips(args.hosts)))
+    with open(os.path.join(workdir, "port.txt"), "w") as f:
+        f.write(str(args.port))
+    metrics_port = args.port + 1
+    env = {
+        "USER_IP_FILE": users, "PORT_FILE": os.path.join(workdir, "port.txt"),
+        "CONTAINERID_FILE": os.path.join(workdir, "containerid.txt"),
+        "ACTION_LOG_FILE": os.path.join(workdir, "action_log.txt"),
+        "COMPLETION_CACHE_FILE": os.path.join(workdir, "completions.json"),
+        # Keep probing students that passed at the normal interval
+        "COMPLETED_RECHECK_INTERVAL": str(CLIENT_CHECK_INTERVAL),
+        "METRICS_PORT": str(metrics_port), "SHARDS": str(args.shards),
+    }
+    try:
+        with Server("Http-Get-Client", [sys.executable, "app.py"], env, metrics_port) as server:
+            return await load_client(server, args, metrics_port)
+    finally:
+        fleet.close()
+        await evaluation.cleanup()
+
+
+def run_client(args, workdir):
+    return asyncio.run(drive_client(args, workdir))
+
+
+RUNNERS = {
+    "http-get": run_http_get,
+    "http-auth": run_http_auth,
+    "echo": run_echo,
+    "grpc": run_grpc,
+    "client": run_client,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(target, result):
+    latency = result["latency_ms"]
+    p99 = "-" if latency["p99"] is None else f"{latency['p99']:.2f}"
+    print(f"{target:<10} {result['throughput']:10,.1f}/s  p50 {latency['p50'] or 0:8.2f} ms  p99 {p99:>8} ms  "
+          f"{result['errors']} errors  {result['dropped']} dropped  "
+          f"CPU {result['server_cpu_ms_per_1k'] or 0:.0f} ms/1k  RSS {result['server_rss_mb']:.1f} MB")
+
+
+def compare(base_path, new_path, threshold):
+    """Print the change of every target's numbers between two result files. Returns True on regression."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{base_path} ({base['meta']['revision']}) -> {new_path} ({new['meta']['revision']})")
+    differing = sorted(key for key, value in new["meta"]["args"].items()
+                       if key != "targets" and base["meta"]["args"].get(key) != value)
+    if differing:
+        print(f"note: the runs used different settings ({', '.join(differing)}), so the numbers may not compare")
+
+    regressed = False
+    for target, result in new["results"].items():
+        old = base["results"].get(target)
+        if old is None:
+            continue
+        rows = [("throughput", old["throughput"], result["throughput"], -1)]
+        rows += [(f"{name} ms", old["latency_ms"][name], result["latency_ms"][name], 1) for name, _ in PERCENTILES]
+        rows += [("CPU ms/1k", old["server_cpu_ms_per_1k"], result["server_cpu_ms_per_1k"], 0),
+                 ("RSS MB", old["server_rss_mb"], result["server_rss_mb"], 0)]
+        for name, before, after, worse in rows:
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            flag = ""
+            if name in ("throughput", "p99 ms") and change * worse > threshold:
+                flag = "  REGRESSION"
+                regressed = True
+            print(f"{target:<10} {name:<11} {before:12,.2f} {after:12,.2f} {change:+8.1f}%{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS)
+    parser.add_argument("--rate", type=float, default=1000.0, help="requests started per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per target")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds of load first")
+    parser.add_argument("--concurrency", type=int, default=256, help="requests in flight before new ones are dropped")
+    parser.add_argument("--connections", type=int, default=64, help="echo: client connections")
+    parser.add_argument("--size", type=int, default=64, help="echo: bytes per round trip")
+    parser.add_argument("--http", choices=["gunicorn", "dev"], default="gunicorn", help="HTTP server to run")
+    parser.add_argument("--grpc-mode", choices=["threads", "aio"], default="threads")
+    parser.add_argument("--hosts", type=int, default=1000, help="client: fake student hosts")
+    parser.add_argument("--shards", type=int, default=1, help="client: prober processes (SHARDS)")
+    parser.add_argument("--port", type=int, default=16000, help="port for the target (and the next one)")
+    parser.add_argument("--out", default=None, help="write the results as JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files and exit")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold for --compare, in %%")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as workdir:
+        for target in args.targets:
+            results[target] = RUNNERS[target](args, workdir)
+            print_result(target, results[target])
+
+    if args.out:
+        meta = {
+            "revision": git_revision(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("out", "compare")},
+        }
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
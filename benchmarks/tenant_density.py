@@ -0,0 +1,164 @@
+"""Exercise instances per GB of memory: Multi-Tenant-Server versus one process per instance.
+
+For each ``--tenants`` count, that many tenant variables files (http-get, http-auth and echo in turn)
+are written to a temporary TENANTS_DIR and Multi-Tenant-Server is started on it. Once every
+tenant listens, each one is checked with a real request (GET /, the secret key and a correct
+unlock for http-auth, an echo round trip) and the server's RSS is read from /proc.
+Instances per GB are then compared with the RSS of a single Http-Get-Server,
+Http-Post-Auth-Header-Server (Flask development server, the lightest way they run) and
+Socket-Server process, which is what every instance costs when each gets its own container.
+
+    python benchmarks/tenant_density.py --tenants 100 500 1000
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+EXERCISES = ["http-get", "http-auth", "echo"]
+SECRET = "benchmark-secret"
+# The single-instance image of each exercise and the code that starts it on ``port``
+SINGLE = {
+    "http-get": ("Http-Get-Server", "import app; app.app.run(host='127.0.0.1', port={port})"),
+    "http-auth": ("Http-Post-Auth-Header-Server", "import app; app.app.run(host='127.0.0.1', port={port})"),
+    "echo": ("Socket-Server", "import app; app.main()"),
+}
+
+
+def rss_bytes(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def wait_listening(ports, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    pending = list(ports)
+    while pending:
+        if proc.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError(f"{len(pending)} ports never started listening")
+        try:
+            socket.create_connection(("127.0.0.1", pending[-1]), timeout=1).close()
+            pending.pop()
+        except OSError:
+            time.sleep(0.05)
+
+
+def check(exercise, port):
+    """Make the requests a student would; True if every answer is the expected one."""
+    base = f"http://127.0.0.1:{port}"
+    try:
+        if exercise == "echo":
+            with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+                sock.sendall(b"hello Bye bye")
+                received = b""
+                while len(received) < 13:
+                    chunk = sock.recv(64)
+                    if not chunk:
+                        break
+                    received += chunk
+                return received == b"hello Bye bye"
+        with urllib.request.urlopen(f"{base}/", timeout=5) as response:
+            ok = json.loads(response.read())["Exercise State"].startswith("Congratulations")
+        if exercise == "http-auth":
+            with urllib.request.urlopen(f"{base}/get-secret-key", timeout=5) as response:
+                ok &= json.loads(response.read())["secret_key"] == SECRET
+            unlock = urllib.request.Request(f"{base}/unlock-treasure", method="POST", headers={"Secretkey": SECRET})
+            with urllib.request.urlopen(unlock, timeout=5) as response:
+                ok &= json.loads(response.read())["status"] == "success"
+        return ok
+    except (OSError, ValueError, KeyError, urllib.error.HTTPError):
+        return False
+
+
+def start(directory, command, env):
+    return subprocess.Popen(command, cwd=os.path.join(ROOT, directory), env=dict(os.environ, **env),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop(proc):
+    proc.terminate()
+    proc.wait()
+
+
+def multi_tenant(count, port_base):
+    """(RSS, instances that answered correctly, startup seconds) for ``count`` tenants."""
+    tenants_dir = tempfile.mkdtemp(prefix="tenants-")
+    try:
+        ports = {}
+        for i in range(count):
+            exercise = EXERCISES[i % len(EXERCISES)]
+            port = port_base + i
+            os.makedirs(os.path.join(tenants_dir, exercise), exist_ok=True)
+            with open(os.path.join(tenants_dir, exercise, f"student-{i}.txt"), "w") as f:
+                f.write(f"{{secret:{SECRET},port:{port}}}")
+            ports[port] = exercise
+
+        started = time.perf_counter()
+        proc = start("Multi-Tenant-Server", [sys.executable, "app.py"],
+                     {"TENANTS_DIR": tenants_dir, "METRICS_PORT": "0", "LOG_LEVEL": "WARNING"})
+        try:
+            wait_listening(ports, proc)
+            startup = time.perf_counter() - started
+            working = sum(check(exercise, port) for port, exercise in ports.items())
+            time.sleep(1)
+            return rss_bytes(proc.pid), working, startup
+        finally:
+            stop(proc)
+    finally:
+        shutil.rmtree(tenants_dir)
+
+
+def single_instance(exercise, port):
+    """RSS of one single-exercise server process after it answered its checks."""
+    directory, code = SINGLE[exercise]
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write(f"{{secret:{SECRET},port:{port}}}")
+    try:
+        proc = start(directory, [sys.executable, "-c", code.format(port=port)],
+                     {"VARIABLES_FILE": f.name, "METRICS_PORT": "0", "LOG_LEVEL": "WARNING"})
+        try:
+            wait_listening([port], proc)
+            if not check(exercise, port):
+                print(f"warning: single {exercise} instance answered incorrectly", file=sys.stderr)
+            time.sleep(0.5)
+            return rss_bytes(proc.pid)
+        finally:
+            stop(proc)
+    finally:
+        os.remove(f.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--port-base", type=int, default=20000, help="first tenant port")
+    args = parser.parse_args()
+
+    singles = [single_instance(exercise, args.port_base) for exercise in EXERCISES]
+    for exercise, rss in zip(EXERCISES, singles):
+        print(f"one process per instance  {exercise:<9}  {rss / 1e6:7.1f} MB each  {1e9 / rss:8,.0f} instances/GB")
+    average = sum(singles) / len(singles)
+
+    empty, _, _ = multi_tenant(0, args.port_base)
+    print(f"multi-tenant, no tenants  {empty / 1e6:7.1f} MB")
+    for count in args.tenants:
+        rss, working, startup = multi_tenant(count, args.port_base)
+        per_tenant = (rss - empty) / count
+        print(f"multi-tenant {count:>6,} tenants  {rss / 1e6:7.1f} MB  {per_tenant / 1024:6.1f} KB/tenant  "
+              f"{count * 1e9 / rss:8,.0f} instances/GB ({count * average / rss:,.0f}x)  "
+              f"{working}/{count} answered correctly  listening after {startup:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,80 @@
-import json
-from flask import Flask, jsonify, request
-from datetime import datetime
+import asyncio
 import logging
 import grpc
-from concurrent import futures
+import os
+import signal
 import time
 import uuid
+from concurrent import futures
 
+import metrics
+import profiler
 import service_pb2
 import service_pb2_grpc
+from journal import Journal, JournalError
+from logconfig import setup_logging
+from store import DuplicateEmail, UserStore
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,  # Set to DEBUG to capture all levels of log messages
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Output to console
-        # Uncomment the next line to also log to a file
-        # logging.FileHandler("/var/log/application.log"),
-    ]
-)
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_PER_SECOND; see logconfig.py)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-VARIABLES_FILE = "/variables.txt"  # Ensure the file path is correct
-
-def load_variables():
-    """Read the variables from the file."""
-    try:
-        with open(VARIABLES_FILE, "r") as f:
-            # Read the raw content
-            raw_content = f.read().strip()
-
-            # Preprocess the content to make it valid JSON
-            if not raw_content.startswith("{") or not raw_content.endswith("}"):
-                raise ValueError("Invalid JSON format in the file.")
-
-            # Convert to valid JSON format: Add double quotes around keys and values
-            json_content = raw_content.replace("{", '{"').replace("}", '"}').replace(":", '":"').replace(",", '","')
-
-            # Deserialize the JSON string into a Python dictionary
-            file_content = json.loads(json_content)
-            logger.debug(f"Variables file content: {file_content}")
-            return file_content
-    except FileNotFoundError:
-        logger.error(f"Error: {VARIABLES_FILE} not found.")
-        return None
-    except Exception as e:
-        logger.error(f"Unexpected error while reading {VARIABLES_FILE}: {e}")
-        return None
+GRPC_PORT = int(os.environ.get("GRPC_PORT", 5015))
+GRPC_SERVER_MODE = os.environ.get("GRPC_SERVER_MODE", "threads")  # "threads" or "aio" (asyncio)
+GRPC_MAX_WORKERS = int(os.environ.get("GRPC_MAX_WORKERS", 10))  # Threads serving RPCs in threads mode
+GRPC_MAX_CONCURRENT_RPCS = int(os.environ.get("GRPC_MAX_CONCURRENT_RPCS", 0)) or None  # Reject RPCs beyond this; 0 = no limit
+GRPC_MAX_CONCURRENT_STREAMS = int(os.environ.get("GRPC_MAX_CONCURRENT_STREAMS", 1000))  # HTTP/2 streams per connection
+GRPC_MAX_MESSAGE_BYTES = int(os.environ.get("GRPC_MAX_MESSAGE_BYTES", 16 * 1024 * 1024))  # Largest request/response
+GRPC_KEEPALIVE_TIME_MS = int(os.environ.get("GRPC_KEEPALIVE_TIME_MS", 60000))  # Ping idle connections this often
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.environ.get("GRPC_KEEPALIVE_TIMEOUT_MS", 20000))  # Drop them if the ping goes unanswered
+GRPC_GRACE_PERIOD = float(os.environ.get("GRPC_GRACE_PERIOD", 10))  # Seconds in-flight RPCs get to finish on shutdown
+LIST_PAGE_SIZE = int(os.environ.get("LIST_PAGE_SIZE", 100))  # ListUsers page size when none is given
+LIST_MAX_PAGE_SIZE = int(os.environ.get("LIST_MAX_PAGE_SIZE", 1000))  # Larger page sizes are capped to this
+STREAM_CHUNK = 256  # Users StreamUsers takes from the store at a time
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 1000))  # Items allowed in one Batch* request
+IMPORT_CHUNK = 500  # ImportUsers requests applied to the store at a time
 
+# Users survive restarts when PERSIST_DIR is set (the Dockerfile sets it); see journal.py
+PERSIST_DIR = os.environ.get("PERSIST_DIR", "")
+JOURNAL_SYNC = os.environ.get("JOURNAL_SYNC", "always")  # "always": fsync before replying; "interval": in the background
+JOURNAL_FLUSH_INTERVAL_MS = int(os.environ.get("JOURNAL_FLUSH_INTERVAL_MS", 5))  # Background flush period for "interval"
+SNAPSHOT_LOG_MB = int(os.environ.get("SNAPSHOT_LOG_MB", 64))  # Snapshot once the log grows past this
 
+# Per-item results of the Batch* RPCs
+USER_EXISTS = (grpc.StatusCode.ALREADY_EXISTS, 'A user with this email already exists')
+USER_NOT_FOUND = (grpc.StatusCode.NOT_FOUND, 'User not found')
 
+# RPC counts and latencies, served at :METRICS_PORT/metrics (see metrics.py)
+RPCS = metrics.REGISTRY.counter("grpc_server_handled_total", "RPCs completed, by method and status code",
+                                ("method", "code"))
+RPC_SECONDS = metrics.REGISTRY.histogram("grpc_server_handling_seconds", "Time spent serving RPCs, by method",
+                                         ("method",))
 
 # In-memory storage for users
-USERS = {}
+def open_journal():
+    if not PERSIST_DIR:
+        return None
+    return Journal(PERSIST_DIR, sync=JOURNAL_SYNC == "always", flush_interval=JOURNAL_FLUSH_INTERVAL_MS / 1000,
+                   snapshot_bytes=SNAPSHOT_LOG_MB * 1024 * 1024)
+
+JOURNAL = open_journal()
+USERS = UserStore(JOURNAL)
+metrics.REGISTRY.gauge("grpc_users", "Users in the store", USERS.__len__)
 
 class UserServiceServicer(service_pb2_grpc.UserServiceServicer):
     def CreateUser(self, request, context):
         user_id = str(uuid.uuid4())
         user = service_pb2.User(id=user_id, name=request.name, email=request.email)
-        USERS[user_id] = user
-        print(f"Created User: {user}")
+        try:
+            USERS.add(user)
+        except DuplicateEmail:
+            context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+            context.set_details('A user with this email already exists')
+            return service_pb2.CreateUserResponse()
+        except JournalError:
+            return _unavailable(context, service_pb2.CreateUserResponse())
+        logger.info("Created user %s", user.id)
         return service_pb2.CreateUserResponse(user=user)
 
     def GetUser(self, request, context):
@@ -75,29 +87,333 @@ class UserServiceServicer(service_pb2_grpc.UserServiceServicer):
             return service_pb2.GetUserResponse()
 
     def ListUsers(self, request, context):
-        return service_pb2.ListUsersResponse(users=list(USERS.values()))
+        # The page token is the store position of the last user on the previous page
+        try:
+            after = int(request.page_token) if request.page_token else 0
+        except ValueError:
+            return _invalid_argument(context, 'Invalid page_token', service_pb2.ListUsersResponse())
+        if request.page_size < 0:
+            return _invalid_argument(context, 'page_size must not be negative', service_pb2.ListUsersResponse())
+        page_size = min(request.page_size or LIST_PAGE_SIZE, LIST_MAX_PAGE_SIZE)
+        users, last = USERS.page(after, page_size)
+        return service_pb2.ListUsersResponse(
+            users=users,
+            next_page_token=str(last) if last is not None else ""
+        )
+
+    def StreamUsers(self, request, context):
+        yield from USERS.iter_users(STREAM_CHUNK)
 
     def DeleteUser(self, request, context):
-        if request.id in USERS:
-            del USERS[request.id]
-            print(f"Deleted User ID: {request.id}")
+        try:
+            deleted = USERS.delete(request.id)
+        except JournalError:
+            return _unavailable(context, service_pb2.DeleteUserResponse(success=False))
+        if deleted is not None:
+            logger.info("Deleted user %s", request.id)
             return service_pb2.DeleteUserResponse(success=True)
         else:
             context.set_code(grpc.StatusCode.NOT_FOUND)
             context.set_details('User not found')
             return service_pb2.DeleteUserResponse(success=False)
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    def BatchCreateUsers(self, request, context):
+        if len(request.requests) > BATCH_MAX_SIZE:
+            return _batch_too_large(context)
+        users = [service_pb2.User(id=str(uuid.uuid4()), name=item.name, email=item.email)
+                 for item in request.requests]
+        try:
+            stored = USERS.add_many(users)
+        except JournalError:
+            return _unavailable(context, service_pb2.BatchUsersResponse())
+        logger.info("Created %s of %s users in batch", sum(user is not None for user in stored), len(users))
+        return _batch_response(stored, USER_EXISTS)
+
+    def BatchGetUsers(self, request, context):
+        if len(request.ids) > BATCH_MAX_SIZE:
+            return _batch_too_large(context)
+        return _batch_response(USERS.get_many(request.ids), USER_NOT_FOUND)
+
+    def BatchDeleteUsers(self, request, context):
+        if len(request.ids) > BATCH_MAX_SIZE:
+            return _batch_too_large(context)
+        try:
+            deleted = USERS.delete_many(request.ids)
+        except JournalError:
+            return _unavailable(context, service_pb2.BatchUsersResponse())
+        logger.info("Deleted %s of %s users in batch", sum(user is not None for user in deleted), len(deleted))
+        return _batch_response(deleted, USER_NOT_FOUND)
+
+    def ImportUsers(self, request_iterator, context):
+        importer = Importer()
+        try:
+            for item in request_iterator:
+                if importer.add(item):
+                    importer.flush()
+            return importer.finish()
+        except JournalError:
+            return _unavailable(context, service_pb2.ImportUsersResponse())
+
+class AsyncUserServiceServicer(UserServiceServicer):
+    """The same RPCs for the grpc.aio server.
+
+    The store never blocks for long, so the unary methods simply run the threaded
+    implementations on the event loop; only the streaming ones need to be async. Writes
+    that wait for a journal fsync run in a worker thread instead.
+    """
+
+    @staticmethod
+    async def _write(method, *args):
+        if JOURNAL is None or not JOURNAL.sync:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    async def CreateUser(self, request, context):
+        return await self._write(super().CreateUser, request, context)
+
+    async def GetUser(self, request, context):
+        return super().GetUser(request, context)
+
+    async def ListUsers(self, request, context):
+        return super().ListUsers(request, context)
+
+    async def StreamUsers(self, request, context):
+        for user in USERS.iter_users(STREAM_CHUNK):
+            yield user
+
+    async def DeleteUser(self, request, context):
+        return await self._write(super().DeleteUser, request, context)
+
+    async def BatchCreateUsers(self, request, context):
+        return await self._write(super().BatchCreateUsers, request, context)
+
+    async def BatchGetUsers(self, request, context):
+        return super().BatchGetUsers(request, context)
+
+    async def BatchDeleteUsers(self, request, context):
+        return await self._write(super().BatchDeleteUsers, request, context)
+
+    async def ImportUsers(self, request_iterator, context):
+        importer = Importer()
+        try:
+            async for item in request_iterator:
+                if importer.add(item):
+                    await self._write(importer.flush)
+            return await self._write(importer.finish)
+        except JournalError:
+            return _unavailable(context, service_pb2.ImportUsersResponse())
+
+class Importer:
+    """Adds the users of an ImportUsers stream to the store IMPORT_CHUNK at a time."""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+        self.index = 0  # Stream position of the first user in chunk
+        self.chunk = []
+
+    def add(self, item):
+        """Queue one request. Returns True when the chunk is full and should be flushed."""
+        self.chunk.append(service_pb2.User(id=str(uuid.uuid4()), name=item.name, email=item.email))
+        return len(self.chunk) >= IMPORT_CHUNK
+
+    def flush(self):
+        for user in USERS.add_many(self.chunk):
+            if user is None:
+                self.errors.append(service_pb2.ImportError(
+                    index=self.index, code=USER_EXISTS[0].value[0], message=USER_EXISTS[1]))
+            else:
+                self.created += 1
+            self.index += 1
+        self.chunk.clear()
+
+    def finish(self):
+        self.flush()
+        logger.info("Imported %s users, %s failed", self.created, len(self.errors))
+        return service_pb2.ImportUsersResponse(created=self.created, errors=self.errors)
+
+def _invalid_argument(context, details, response):
+    context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+    context.set_details(details)
+    return response
+
+def _unavailable(context, response):
+    # The journal failed (see journal.JournalError); writes are refused until a restart
+    context.set_code(grpc.StatusCode.UNAVAILABLE)
+    context.set_details('Users cannot be saved right now')
+    return response
+
+def _batch_too_large(context):
+    return _invalid_argument(context, f'At most {BATCH_MAX_SIZE} items per batch', service_pb2.BatchUsersResponse())
+
+def _batch_response(users, failure):
+    """BatchUsersResponse with one result per item of ``users``, which is None where it failed."""
+    status, message = failure
+    code = status.value[0]
+    return service_pb2.BatchUsersResponse(results=[
+        service_pb2.UserResult(user=user) if user is not None
+        else service_pb2.UserResult(code=code, message=message)
+        for user in users
+    ])
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Times every RPC and counts it by method and status code.
+
+    Each method's handler is wrapped once and reused, so an RPC only pays for the timing.
+    """
+
+    def __init__(self):
+        self._handlers = {}  # Method path -> instrumented handler
+
+    def intercept_service(self, continuation, handler_call_details):
+        method = handler_call_details.method
+        handler = self._handlers.get(method)
+        if handler is None:
+            handler = continuation(handler_call_details)
+            if handler is not None:
+                handler = self._handlers[method] = _instrument(handler, method, _timed, _timed_stream)
+        return handler
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """MetricsInterceptor for the grpc.aio server, whose handlers are coroutines."""
+
+    def __init__(self):
+        self._handlers = {}
+
+    async def intercept_service(self, continuation, handler_call_details):
+        method = handler_call_details.method
+        handler = self._handlers.get(method)
+        if handler is None:
+            handler = await continuation(handler_call_details)
+            if handler is not None:
+                handler = self._handlers[method] = _instrument(handler, method, _timed_async, _timed_stream_async)
+        return handler
+
+def _instrument(handler, method, unary, streaming):
+    """``handler`` with its behavior wrapped by ``unary`` or ``streaming`` (by response type)."""
+    name = method.rpartition("/")[2]
+    latency = RPC_SECONDS.labels(name)
+
+    def record(context, started, failed):
+        latency.observe(time.perf_counter() - started)
+        code = context.code() or (grpc.StatusCode.UNKNOWN if failed else grpc.StatusCode.OK)
+        RPCS.labels(name, code.name).inc()
+
+    if handler.unary_unary:
+        return handler._replace(unary_unary=unary(handler.unary_unary, record))
+    if handler.stream_unary:
+        return handler._replace(stream_unary=unary(handler.stream_unary, record))
+    if handler.unary_stream:
+        return handler._replace(unary_stream=streaming(handler.unary_stream, record))
+    return handler._replace(stream_stream=streaming(handler.stream_stream, record))
+
+def _timed(behavior, record):
+    def wrapper(request, context):
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = behavior(request, context)
+            failed = False
+            return response
+        finally:
+            record(context, started, failed)
+    return wrapper
+
+def _timed_stream(behavior, record):
+    def wrapper(request, context):
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield from behavior(request, context)
+            failed = False
+        finally:
+            record(context, started, failed)
+    return wrapper
+
+def _timed_async(behavior, record):
+    async def wrapper(request, context):
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await behavior(request, context)
+            failed = False
+            return response
+        finally:
+            record(context, started, failed)
+    return wrapper
+
+def _timed_stream_async(behavior, record):
+    async def wrapper(request, context):
+        started = time.perf_counter()
+        failed = True
+        try:
+            async for response in behavior(request, context):
+                yield response
+            failed = False
+        finally:
+            record(context, started, failed)
+    return wrapper
+
+SERVER_OPTIONS = [
+    ("grpc.max_concurrent_streams", GRPC_MAX_CONCURRENT_STREAMS),
+    ("grpc.max_receive_message_length", GRPC_MAX_MESSAGE_BYTES),
+    ("grpc.max_send_message_length", GRPC_MAX_MESSAGE_BYTES),
+    ("grpc.keepalive_time_ms", GRPC_KEEPALIVE_TIME_MS),
+    ("grpc.keepalive_timeout_ms", GRPC_KEEPALIVE_TIMEOUT_MS),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+def build_server(port=GRPC_PORT, max_workers=GRPC_MAX_WORKERS):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers), options=SERVER_OPTIONS,
+                         interceptors=[MetricsInterceptor()], maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS)
     service_pb2_grpc.add_UserServiceServicer_to_server(UserServiceServicer(), server)
-    server.add_insecure_port(f"[::]:5015")
+    server.add_insecure_port(f"[::]:{port}")
+    return server
+
+def build_aio_server(port=GRPC_PORT):
+    server = grpc.aio.server(options=SERVER_OPTIONS, interceptors=[AsyncMetricsInterceptor()],
+                             maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS)
+    service_pb2_grpc.add_UserServiceServicer_to_server(AsyncUserServiceServicer(), server)
+    server.add_insecure_port(f"[::]:{port}")
+    return server
+
+def serve():
+    server = build_server()
     server.start()
-    print(f"gRPC server is running on port 5015...")
-    try:
-        while True:
-            time.sleep(86400)  # Keep the server alive for 1 day
-    except KeyboardInterrupt:
-        server.stop(0)
+    logger.info("gRPC server is running on port %s...", GRPC_PORT)
+
+    # Stop accepting RPCs on SIGTERM/SIGINT and let in-flight ones finish
+    def shutdown(signum, frame):
+        logger.info("Received signal %s, draining for up to %ss...", signum, GRPC_GRACE_PERIOD)
+        server.stop(GRPC_GRACE_PERIOD)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    profiler.install_signal_handler()
+    server.wait_for_termination()
+    if JOURNAL is not None:
+        JOURNAL.close()
+
+async def serve_aio():
+    server = build_aio_server()
+    await server.start()
+    logger.info("gRPC asyncio server is running on port %s...", GRPC_PORT)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+    profiler.install_signal_handler()
+    await stopping.wait()
+    logger.info("Draining for up to %ss...", GRPC_GRACE_PERIOD)
+    await server.stop(GRPC_GRACE_PERIOD)
+    if JOURNAL is not None:
+        JOURNAL.close()
 
 if __name__ == '__main__':
-    serve()
\ No newline at end of file
+    metrics.serve(routes={"/debug/profile": profiler.admin_route})
+    if GRPC_SERVER_MODE == "aio":
+        asyncio.run(serve_aio())
+    else:
+        serve()
@@ -1,4 +1,5 @@
 #!/bin/sh
 
 echo "Starting the gRPC Python server..."
-python app.py
\ No newline at end of file
+# exec so SIGTERM from docker stop reaches the server and it can drain
+exec python app.py
\ No newline at end of file
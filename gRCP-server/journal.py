@@ -0,0 +1,318 @@
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+import service_pb2
+
+logger = logging.getLogger(__name__)
+
+PUT = 1  # Payload is a serialized service_pb2.User
+DELETE = 2  # Payload is the UTF-8 user id
+
+# Log record: op, payload length, CRC-32 of the payload, then the payload
+_RECORD = struct.Struct("<BII")
+# Snapshot: magic and user count, then each user as its length and serialized bytes
+_SNAPSHOT_MAGIC = b"USERSNP1"
+_SNAPSHOT_HEADER = struct.Struct("<8sQ")
+_LENGTH = struct.Struct("<I")
+
+_FILE = re.compile(r"^(log|snapshot)-(\d+)\.bin$")
+
+
+class JournalError(Exception):
+    """Raised by writes once the journal could not write or fsync its log.
+
+    The journal stops taking records after the first failure, since it cannot tell what
+    made it to disk; a restart recovers whatever did.
+    """
+
+
+class Journal:
+    """Durable history of a UserStore: snapshots plus an append-only operation log.
+
+    Files are numbered by generation. ``snapshot-N.bin`` holds every user at the moment
+    generation N started and ``log-N.bin`` the puts and deletes made since. Recovery loads
+    the newest snapshot and replays the logs from its generation on.
+
+    Writes are group-committed: ``put()``/``delete()`` only append to a memory buffer and
+    return a ticket, and a flusher thread writes and fsyncs whatever has accumulated while
+    the previous fsync ran. With ``sync=True``, ``wait(ticket)`` blocks until the ticket is
+    on disk; with ``sync=False`` it returns at once and the log is flushed every
+    ``flush_interval`` seconds. If a write or fsync fails, waiters and later appends get a
+    JournalError. Once the current log outgrows ``snapshot_bytes``, a new
+    snapshot is written in the background and older files are removed.
+    """
+
+    def __init__(self, directory, sync=True, flush_interval=0.005, snapshot_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.sync = sync
+        self.flush_interval = flush_interval
+        self.snapshot_bytes = snapshot_bytes
+        self._cond = threading.Condition()
+        self._segments = []  # [file, bytearray] pending for each log file, oldest first
+        self._appended = 0  # Ticket of the last record appended
+        self._durable = 0  # Ticket of the last record written (and fsynced if sync)
+        self._generation = 0
+        self._file = None
+        self._log_bytes = 0  # Size of the current log including pending records
+        self._checkpoint = None
+        self._snapshotting = False
+        self._closing = False
+        self._flusher = None
+        self._failure = None  # The OSError that stopped the flusher
+        self._rotated_at = 0  # Ticket of the last record before the latest rotate()
+        self.flushes = 0  # Writes (and fsyncs if sync) of the log so far
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, kind, generation):
+        return os.path.join(self.directory, f"{kind}-{generation}.bin")
+
+    def _generations(self, kind):
+        found = []
+        for name in os.listdir(self.directory):
+            match = _FILE.match(name)
+            if match and match.group(1) == kind:
+                found.append(int(match.group(2)))
+        return sorted(found)
+
+    def recover(self):
+        """Rebuild the users from disk. Returns them as a dict of id -> User, in store order."""
+        started = time.perf_counter()
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):  # A snapshot that was being written when we stopped
+                os.remove(os.path.join(self.directory, name))
+        snapshots = self._generations("snapshot")
+        generation = snapshots[-1] if snapshots else 0
+        users = _read_snapshot(self._path("snapshot", generation)) if snapshots else {}
+        from_snapshot = len(users)
+
+        replayed = 0
+        for log_generation in self._generations("log"):
+            if log_generation >= generation:
+                replayed += _replay_log(self._path("log", log_generation), users)
+                generation = log_generation
+
+        self._generation = generation
+        logger.info("Recovered %s users (%s from snapshot, %s log records) in %.2fs",
+                    len(users), from_snapshot, replayed, time.perf_counter() - started)
+        return users
+
+    def start(self, checkpoint):
+        """Open the log for appending and start the flusher.
+
+        ``checkpoint()`` is called to take a snapshot. It must call ``rotate()`` and copy
+        the users atomically with respect to ``put()``/``delete()``, and return
+        ``(generation, users)``.
+        """
+        self._checkpoint = checkpoint
+        self._file = open(self._path("log", self._generation), "ab", buffering=0)
+        self._log_bytes = self._file.tell()
+        self._segments.append([self._file, bytearray()])
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-flusher", daemon=True)
+        self._flusher.start()
+
+    def put(self, user):
+        return self._append(PUT, user.SerializeToString())
+
+    def delete(self, user_id):
+        return self._append(DELETE, user_id.encode())
+
+    def _append(self, op, payload):
+        record = _RECORD.pack(op, len(payload), zlib.crc32(payload)) + payload
+        with self._cond:
+            self.check()
+            self._segments[-1][1] += record
+            self._log_bytes += len(record)
+            self._appended += 1
+            self._cond.notify_all()
+            return self._appended
+
+    def wait(self, ticket):
+        """Block until the record with ``ticket`` is durable (only if ``sync``)."""
+        if self.sync and ticket:
+            self._wait_durable(ticket)
+
+    def _wait_durable(self, ticket):
+        with self._cond:
+            while self._durable < ticket:
+                self.check()
+                self._cond.wait()
+
+    @property
+    def durable(self):
+        """Ticket of the last record known to be on disk."""
+        return self._durable
+
+    def check(self):
+        """Raise JournalError if the flusher has failed."""
+        if self._failure is not None:
+            raise JournalError(f"Journal in {self.directory} failed: {self._failure}") from self._failure
+
+    def rotate(self):
+        """Start a new log generation and return its number; see ``start()``."""
+        with self._cond:
+            self._generation += 1
+            self._file = open(self._path("log", self._generation), "ab", buffering=0)
+            self._segments.append([self._file, bytearray()])
+            self._log_bytes = 0
+            self._rotated_at = self._appended
+            return self._generation
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._closing and not any(buffer for _, buffer in self._segments) \
+                        and len(self._segments) == 1:
+                    self._cond.wait()
+                segments = self._segments
+                current = self._file
+                self._segments = [[current, bytearray()]]
+                upto = self._appended
+                closing = self._closing
+                snapshot_due = (self._log_bytes >= self.snapshot_bytes and not self._snapshotting
+                                and not closing)
+                if snapshot_due:
+                    self._snapshotting = True
+
+            try:
+                for file, buffer in segments:
+                    if buffer:
+                        file.write(buffer)
+                    if buffer or file is not current:
+                        os.fsync(file.fileno())
+                    if file is not current:
+                        file.close()  # Rotated away; nothing more is appended to it
+            except OSError as e:
+                # After a failed fsync the kernel may have dropped the dirty pages, so a
+                # retry that succeeds proves nothing; fail every pending and later write.
+                logger.exception("Journal write failed; no more writes are accepted")
+                with self._cond:
+                    self._failure = e
+                    self._cond.notify_all()
+                return
+
+            with self._cond:
+                self._durable = upto
+                self.flushes += 1
+                self._cond.notify_all()
+            if snapshot_due:
+                threading.Thread(target=self.snapshot, name="journal-snapshot", daemon=True).start()
+            if closing:
+                return
+            if not self.sync:
+                time.sleep(self.flush_interval)
+
+    def snapshot(self):
+        """Write a snapshot of the store now and remove the files it supersedes."""
+        try:
+            started = time.perf_counter()
+            generation, users = self._checkpoint()
+            # The copy may hold writes still being flushed; should that flush fail, they
+            # are undone in the store and must not reach the snapshot either
+            self._wait_durable(self._rotated_at)
+            path = self._path("snapshot", generation)
+            _write_snapshot(path, users)
+            for kind in ("snapshot", "log"):
+                for old in self._generations(kind):
+                    if old < generation:
+                        os.remove(self._path(kind, old))
+            logger.info("Wrote snapshot %s of %s users in %.2fs",
+                        generation, len(users), time.perf_counter() - started)
+        except JournalError as e:
+            logger.warning("Skipped a snapshot: %s", e)
+        finally:
+            with self._cond:
+                self._snapshotting = False
+
+    def close(self):
+        """Flush what is pending and stop the flusher."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._flusher is not None:
+            self._flusher.join()
+        if self._file is not None:
+            self._file.close()
+
+
+def _write_snapshot(path, users):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, len(users)))
+        pack = _LENGTH.pack
+        chunk = []
+        for user in users:
+            data = user.SerializeToString()
+            chunk.append(pack(len(data)))
+            chunk.append(data)
+            if len(chunk) >= 8192:
+                f.write(b"".join(chunk))
+                chunk.clear()
+        f.write(b"".join(chunk))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+def _read_snapshot(path):
+    users = {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, count = _SNAPSHOT_HEADER.unpack_from(mm, 0)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a user snapshot")
+        parse = service_pb2.User.FromString
+        unpack = _LENGTH.unpack_from
+        offset = _SNAPSHOT_HEADER.size
+        for _ in range(count):
+            (length,) = unpack(mm, offset)
+            offset += 4
+            user = parse(mm[offset:offset + length])
+            offset += length
+            users[user.id] = user
+    return users
+
+
+def _replay_log(path, users):
+    """Apply the records of a log to ``users``. A torn or corrupt tail is cut off."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    applied = 0
+    offset = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        parse = service_pb2.User.FromString
+        while offset + _RECORD.size <= size:
+            op, length, crc = _RECORD.unpack_from(mm, offset)
+            start = offset + _RECORD.size
+            payload = mm[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            if op == PUT:
+                user = parse(payload)
+                users[user.id] = user
+            elif op == DELETE:
+                users.pop(payload.decode(), None)
+            else:
+                break
+            offset = start + length
+            applied += 1
+
+    if offset < size:
+        logger.warning("Truncating %s bytes of incomplete records at the end of %s", size - offset, path)
+        with open(path, "r+b") as f:
+            f.truncate(offset)
+    return applied
+
+
+def _fsync_directory(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
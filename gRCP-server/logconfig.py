@@ -0,0 +1,102 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()  # DEBUG, INFO, WARNING, ERROR
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")  # "json" lines or the classic "text"
+LOG_SAMPLE_PER_SECOND = int(os.environ.get("LOG_SAMPLE_PER_SECOND", 20))  # Per message template; 0 = keep all
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line: time, level, logger, message (and traceback)."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass at most ``per_second`` DEBUG/INFO records per message template each second.
+
+    Records are keyed by logger and unformatted message, so "Probe of %s failed" counts as
+    one template whatever the host. Warnings and errors always pass. When a template was
+    throttled, its next passing record notes how many were dropped.
+    """
+
+    def __init__(self, per_second):
+        super().__init__()
+        self.per_second = per_second
+        self._window = 0
+        self._counts = {}  # (logger, template) -> records seen this second
+        self._dropped = {}  # (logger, template) -> records dropped since the last one passed
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = int(time.monotonic())
+        with self._lock:
+            if now != self._window:
+                self._window = now
+                self._counts.clear()
+            seen = self._counts.get(key, 0) + 1
+            self._counts[key] = seen
+            if seen > self.per_second:
+                self._dropped[key] = self._dropped.get(key, 0) + 1
+                return False
+            dropped = self._dropped.pop(key, 0)
+        if dropped:
+            record.msg = f"{record.msg} [{dropped} similar messages dropped]"
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Formatting happens on the listener thread, not in the caller
+        return record
+
+
+_listener = None
+
+
+def setup_logging():
+    """Route the root logger through a queue to a background thread writing to stderr.
+
+    Safe to call more than once; only the first call configures anything.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    if LOG_SAMPLE_PER_SECOND > 0:
+        handler.addFilter(SamplingFilter(LOG_SAMPLE_PER_SECOND))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rservice.proto\x12\x0buserservice\"/\n\x04User\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\"0\n\x11\x43reateUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\"5\n\x12\x43reateUserResponse\x12\x1f\n\x04user\x18\x01 \x01(\x0b\x32\x11.userservice.User\"\x1c\n\x0eGetUserRequest\x12\n\n\x02id\x18\x01 \x01(\t\"2\n\x0fGetUserResponse\x12\x1f\n\x04user\x18\x01 \x01(\x0b\x32\x11.userservice.User\"\x12\n\x10ListUsersRequest\"5\n\x11ListUsersResponse\x12 \n\x05users\x18\x01 \x03(\x0b\x32\x11.userservice.User\"\x1f\n\x11\x44\x65leteUserRequest\x12\n\n\x02id\x18\x01 \x01(\t\"%\n\x12\x44\x65leteUserResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x32\xbd\x02\n\x0bUserService\x12M\n\nCreateUser\x12\x1e.userservice.CreateUserRequest\x1a\x1f.userservice.CreateUserResponse\x12\x44\n\x07GetUser\x12\x1b.userservice.GetUserRequest\x1a\x1c.userservice.GetUserResponse\x12J\n\tListUsers\x12\x1d.userservice.ListUsersRequest\x1a\x1e.userservice.ListUsersResponse\x12M\n\nDeleteUser\x12\x1e.userservice.DeleteUserRequest\x1a\x1f.userservice.DeleteUserResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rservice.proto\x12\x0buserservice\"/\n\x04User\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\"0\n\x11\x43reateUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\"5\n\x12\x43reateUserResponse\x12\x1f\n\x04user\x18\x01 \x01(\x0b\x32\x11.userservice.User\"\x1c\n\x0eGetUserRequest\x12\n\n\x02id\x18\x01 \x01(\t\"2\n\x0fGetUserResponse\x12\x1f\n\x04user\x18\x01 \x01(\x0b\x32\x11.userservice.User\"9\n\x10ListUsersRequest\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\"N\n\x11ListUsersResponse\x12 \n\x05users\x18\x01 \x03(\x0b\x32\x11.userservice.User\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"\x14\n\x12StreamUsersRequest\"\x1f\n\x11\x44\x65leteUserRequest\x12\n\n\x02id\x18\x01 \x01(\t\"%\n\x12\x44\x65leteUserResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"K\n\x17\x42\x61tchCreateUsersRequest\x12\x30\n\x08requests\x18\x01 \x03(\x0b\x32\x1e.userservice.CreateUserRequest\"#\n\x14\x42\x61tchGetUsersRequest\x12\x0b\n\x03ids\x18\x01 \x03(\t\"&\n\x17\x42\x61tchDeleteUsersRequest\x12\x0b\n\x03ids\x18\x01 \x03(\t\"L\n\nUserResult\x12\x1f\n\x04user\x18\x01 \x01(\x0b\x32\x11.userservice.User\x12\x0c\n\x04\x63ode\x18\x02 \x01(\x05\x12\x0f\n\x07message\x18\x03 \x01(\t\">\n\x12\x42\x61tchUsersResponse\x12(\n\x07results\x18\x01 \x03(\x0b\x32\x17.userservice.UserResult\";\n\x0bImportError\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x0c\n\x04\x63ode\x18\x02 \x01(\x05\x12\x0f\n\x07message\x18\x03 \x01(\t\"P\n\x13ImportUsersResponse\x12\x0f\n\x07\x63reated\x18\x01 \x01(\x05\x12(\n\x06\x65rrors\x18\x02 \x03(\x0b\x32\x18.userservice.ImportError2\xe0\x05\n\x0bUserService\x12M\n\nCreateUser\x12\x1e.userservice.CreateUserRequest\x1a\x1f.userservice.CreateUserResponse\x12\x44\n\x07GetUser\x12\x1b.userservice.GetUserRequest\x1a\x1c.userservice.GetUserResponse\x12J\n\tListUsers\x12\x1d.userservice.ListUsersRequest\x1a\x1e.userservice.ListUsersResponse\x12\x43\n\x0bStreamUsers\x12\x1f.userservice.StreamUsersRequest\x1a\x11.userservice.User0\x01\x12M\n\nDeleteUser\x12\x1e.userservice.DeleteUserRequest\x1a\x1f.userservice.DeleteUserResponse\x12Y\n\x10\x42\x61tchCreateUsers\x12$.userservice.BatchCreateUsersRequest\x1a\x1f.userservice.BatchUsersResponse\x12S\n\rBatchGetUsers\x12!.userservice.BatchGetUsersRequest\x1a\x1f.userservice.BatchUsersResponse\x12Y\n\x10\x42\x61tchDeleteUsers\x12$.userservice.BatchDeleteUsersRequest\x1a\x1f.userservice.BatchUsersResponse\x12Q\n\x0bImportUsers\x12\x1e.userservice.CreateUserRequest\x1a .userservice.ImportUsersResponse(\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -42,13 +42,29 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_GETUSERRESPONSE']._serialized_start=214
   _globals['_GETUSERRESPONSE']._serialized_end=264
   _globals['_LISTUSERSREQUEST']._serialized_start=266
-  _globals['_LISTUSERSREQUEST']._serialized_end=284
-  _globals['_LISTUSERSRESPONSE']._serialized_start=286
-  _globals['_LISTUSERSRESPONSE']._serialized_end=339
-  _globals['_DELETEUSERREQUEST']._serialized_start=341
-  _globals['_DELETEUSERREQUEST']._serialized_end=372
-  _globals['_DELETEUSERRESPONSE']._serialized_start=374
-  _globals['_DELETEUSERRESPONSE']._serialized_end=411
-  _globals['_USERSERVICE']._serialized_start=414
-  _globals['_USERSERVICE']._serialized_end=731
+  _globals['_LISTUSERSREQUEST']._serialized_end=323
+  _globals['_LISTUSERSRESPONSE']._serialized_start=325
+  _globals['_LISTUSERSRESPONSE']._serialized_end=403
+  _globals['_STREAMUSERSREQUEST']._serialized_start=405
+  _globals['_STREAMUSERSREQUEST']._serialized_end=425
+  _globals['_DELETEUSERREQUEST']._serialized_start=427
+  _globals['_DELETEUSERREQUEST']._serialized_end=458
+  _globals['_DELETEUSERRESPONSE']._serialized_start=460
+  _globals['_DELETEUSERRESPONSE']._serialized_end=497
+  _globals['_BATCHCREATEUSERSREQUEST']._serialized_start=499
+  _globals['_BATCHCREATEUSERSREQUEST']._serialized_end=574
+  _globals['_BATCHGETUSERSREQUEST']._serialized_start=576
+  _globals['_BATCHGETUSERSREQUEST']._serialized_end=611
+  _globals['_BATCHDELETEUSERSREQUEST']._serialized_start=613
+  _globals['_BATCHDELETEUSERSREQUEST']._serialized_end=651
+  _globals['_USERRESULT']._serialized_start=653
+  _globals['_USERRESULT']._serialized_end=729
+  _globals['_BATCHUSERSRESPONSE']._serialized_start=731
+  _globals['_BATCHUSERSRESPONSE']._serialized_end=793
+  _globals['_IMPORTERROR']._serialized_start=795
+  _globals['_IMPORTERROR']._serialized_end=854
+  _globals['_IMPORTUSERSRESPONSE']._serialized_start=856
+  _globals['_IMPORTUSERSRESPONSE']._serialized_end=936
+  _globals['_USERSERVICE']._serialized_start=939
+  _globals['_USERSERVICE']._serialized_end=1675
 # @@protoc_insertion_point(module_scope)
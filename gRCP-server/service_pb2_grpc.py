@@ -49,11 +49,36 @@ class UserServiceStub(object):
                 request_serializer=service__pb2.ListUsersRequest.SerializeToString,
                 response_deserializer=service__pb2.ListUsersResponse.FromString,
                 _registered_method=True)
+        self.StreamUsers = channel.unary_stream(
+                '/userservice.UserService/StreamUsers',
+                request_serializer=service__pb2.StreamUsersRequest.SerializeToString,
+                response_deserializer=service__pb2.User.FromString,
+                _registered_method=True)
         self.DeleteUser = channel.unary_unary(
                 '/userservice.UserService/DeleteUser',
                 request_serializer=service__pb2.DeleteUserRequest.SerializeToString,
                 response_deserializer=service__pb2.DeleteUserResponse.FromString,
                 _registered_method=True)
+        self.BatchCreateUsers = channel.unary_unary(
+                '/userservice.UserService/BatchCreateUsers',
+                request_serializer=service__pb2.BatchCreateUsersRequest.SerializeToString,
+                response_deserializer=service__pb2.BatchUsersResponse.FromString,
+                _registered_method=True)
+        self.BatchGetUsers = channel.unary_unary(
+                '/userservice.UserService/BatchGetUsers',
+                request_serializer=service__pb2.BatchGetUsersRequest.SerializeToString,
+                response_deserializer=service__pb2.BatchUsersResponse.FromString,
+                _registered_method=True)
+        self.BatchDeleteUsers = channel.unary_unary(
+                '/userservice.UserService/BatchDeleteUsers',
+                request_serializer=service__pb2.BatchDeleteUsersRequest.SerializeToString,
+                response_deserializer=service__pb2.BatchUsersResponse.FromString,
+                _registered_method=True)
+        self.ImportUsers = channel.stream_unary(
+                '/userservice.UserService/ImportUsers',
+                request_serializer=service__pb2.CreateUserRequest.SerializeToString,
+                response_deserializer=service__pb2.ImportUsersResponse.FromString,
+                _registered_method=True)
 
 
 class UserServiceServicer(object):
@@ -77,12 +102,42 @@ class UserServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def DeleteUser(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchCreateUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchGetUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchDeleteUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ImportUsers(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_UserServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -101,11 +156,36 @@ def add_UserServiceServicer_to_server(servicer, server):
                     request_deserializer=service__pb2.ListUsersRequest.FromString,
                     response_serializer=service__pb2.ListUsersResponse.SerializeToString,
             ),
+            'StreamUsers': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamUsers,
+                    request_deserializer=service__pb2.StreamUsersRequest.FromString,
+                    response_serializer=service__pb2.User.SerializeToString,
+            ),
             'DeleteUser': grpc.unary_unary_rpc_method_handler(
                     servicer.DeleteUser,
                     request_deserializer=service__pb2.DeleteUserRequest.FromString,
                     response_serializer=service__pb2.DeleteUserResponse.SerializeToString,
             ),
+            'BatchCreateUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchCreateUsers,
+                    request_deserializer=service__pb2.BatchCreateUsersRequest.FromString,
+                    response_serializer=service__pb2.BatchUsersResponse.SerializeToString,
+            ),
+            'BatchGetUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetUsers,
+                    request_deserializer=service__pb2.BatchGetUsersRequest.FromString,
+                    response_serializer=service__pb2.BatchUsersResponse.SerializeToString,
+            ),
+            'BatchDeleteUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchDeleteUsers,
+                    request_deserializer=service__pb2.BatchDeleteUsersRequest.FromString,
+                    response_serializer=service__pb2.BatchUsersResponse.SerializeToString,
+            ),
+            'ImportUsers': grpc.stream_unary_rpc_method_handler(
+                    servicer.ImportUsers,
+                    request_deserializer=service__pb2.CreateUserRequest.FromString,
+                    response_serializer=service__pb2.ImportUsersResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'userservice.UserService', rpc_method_handlers)
@@ -198,6 +278,33 @@ class UserService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def StreamUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/userservice.UserService/StreamUsers',
+            service__pb2.StreamUsersRequest.SerializeToString,
+            service__pb2.User.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def DeleteUser(request,
             target,
@@ -224,3 +331,111 @@ class UserService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def BatchCreateUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/userservice.UserService/BatchCreateUsers',
+            service__pb2.BatchCreateUsersRequest.SerializeToString,
+            service__pb2.BatchUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchGetUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/userservice.UserService/BatchGetUsers',
+            service__pb2.BatchGetUsersRequest.SerializeToString,
+            service__pb2.BatchUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchDeleteUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/userservice.UserService/BatchDeleteUsers',
+            service__pb2.BatchDeleteUsersRequest.SerializeToString,
+            service__pb2.BatchUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ImportUsers(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/userservice.UserService/ImportUsers',
+            service__pb2.CreateUserRequest.SerializeToString,
+            service__pb2.ImportUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,289 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+
+class DuplicateEmail(Exception):
+    """Raised when a user is added with an email another user already has."""
+
+
+class UserStore:
+    """In-memory users keyed by id, with a unique secondary index on email.
+
+    Writers (``add``, ``delete`` and their batch forms) take one short lock that keeps the
+    id map, the email index and the insertion order consistent. Readers never lock: single
+    lookups are atomic dict reads, and ``page()`` walks the insertion order from a
+    position, so paging through the users does not hold up writers.
+
+    Users are stored as given and must not be mutated afterwards. They need ``id`` and
+    ``email`` attributes; an empty email is not indexed and never conflicts.
+
+    With a ``journal`` (see journal.py) the store starts from the users it recovers, and
+    every write is logged under the lock and waited on after releasing it, so concurrent
+    writers share fsyncs. Once the journal fails, writes raise JournalError and leave the
+    store as it was: with a sync journal, the writes that never became durable are undone,
+    newest first, and later writes are refused before they change anything.
+    """
+
+    def __init__(self, journal=None):
+        self._users = {}  # id -> user
+        self._by_email = {}  # email -> id
+        self._seq_of = {}  # id -> position in the insertion order
+        self._lock = threading.Lock()
+        # Insertion order as two parallel lists, sorted by seq. A deleted id is left in
+        # place as None until compaction swaps in trimmed lists.
+        self._order = ([], [])  # (seqs, ids)
+        self._next_seq = 1
+        self._tombstones = 0
+        self._journal = journal
+        self._undo = deque()  # (ticket, undo entry) of writes a sync journal has not confirmed yet
+        if journal is not None:
+            self._restore(journal.recover())
+            journal.start(self._checkpoint)
+
+    def _restore(self, users):
+        """Start from ``users``, a dict of id -> user in order with unique emails."""
+        self._users = users
+        self._by_email = {user.email: user_id for user_id, user in users.items() if user.email}
+        self._seq_of = dict(zip(users, range(1, len(users) + 1)))
+        self._order = (list(range(1, len(users) + 1)), list(users))
+        self._next_seq = len(users) + 1
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def get(self, user_id):
+        return self._users.get(user_id)
+
+    def get_by_email(self, email):
+        user_id = self._by_email.get(email)
+        return self._users.get(user_id) if user_id is not None else None
+
+    def add(self, user):
+        """Store ``user``, replacing a user with the same id. Raises DuplicateEmail.
+
+        A replaced user keeps its place in the order; a new one goes to the end.
+        """
+        with self._lock:
+            self._check_journal()
+            previous = self._users.get(user.id)
+            if not self._add(user):
+                raise DuplicateEmail(user.email)
+            ticket = self._log([("put", user, previous)])
+        self._wait(ticket)
+        return user
+
+    def add_many(self, users):
+        """Store each of ``users`` in turn under one lock acquisition.
+
+        Returns a list with, per user, the user if it was stored or None if its email was
+        already taken (possibly by an earlier user of the same batch).
+        """
+        stored = []
+        writes = []
+        with self._lock:
+            self._check_journal()
+            for user in users:
+                previous = self._users.get(user.id)
+                if self._add(user):
+                    stored.append(user)
+                    writes.append(("put", user, previous))
+                else:
+                    stored.append(None)
+            ticket = self._log(writes)
+        self._wait(ticket)
+        return stored
+
+    def _add(self, user):
+        """Store ``user`` unless its email is taken. Called with the lock held."""
+        if user.email:
+            owner = self._by_email.get(user.email)
+            if owner is not None and owner != user.id:
+                return False
+        previous = self._users.get(user.id)
+        if previous is not None and previous.email and previous.email != user.email:
+            del self._by_email[previous.email]
+        if previous is None:
+            seqs, ids = self._order
+            seq = self._next_seq
+            self._next_seq += 1
+            self._seq_of[user.id] = seq
+            ids.append(user.id)  # ids first, so a reader bisecting seqs can index ids
+            seqs.append(seq)
+        self._users[user.id] = user
+        if user.email:
+            self._by_email[user.email] = user.id
+        return True
+
+    def get_many(self, user_ids):
+        """The user for each of ``user_ids``, or None where there is none."""
+        users = self._users
+        return [users.get(user_id) for user_id in user_ids]
+
+    def delete(self, user_id):
+        """Remove and return the user with ``user_id``, or None if there is none."""
+        with self._lock:
+            self._check_journal()
+            seq = self._seq_of.get(user_id)
+            user = self._delete(user_id)
+            ticket = self._log([("delete", user, seq)] if user is not None else [])
+        self._wait(ticket)
+        return user
+
+    def delete_many(self, user_ids):
+        """Remove each of ``user_ids`` under one lock acquisition; see ``delete``."""
+        deleted = []
+        writes = []
+        with self._lock:
+            self._check_journal()
+            for user_id in user_ids:
+                seq = self._seq_of.get(user_id)
+                user = self._delete(user_id)
+                deleted.append(user)
+                if user is not None:
+                    writes.append(("delete", user, seq))
+            ticket = self._log(writes)
+        self._wait(ticket)
+        return deleted
+
+    def _check_journal(self):
+        """Raise JournalError before changing anything if the journal failed. Lock held."""
+        if self._journal:
+            self._journal.check()
+
+    def _log(self, writes):
+        """Journal ``writes``, already applied, and return the last ticket (0 if none).
+
+        Each write is ("put", user, user it replaced or None) or ("delete", user, its
+        seq). If the journal fails meanwhile, the writes are undone before JournalError is
+        raised. Called with the lock held.
+        """
+        if not self._journal or not writes:
+            return 0
+        journal = self._journal
+        if journal.sync:
+            durable = journal.durable
+            while self._undo and self._undo[0][0] <= durable:
+                self._undo.popleft()
+        ticket = 0
+        for i, (kind, user, _) in enumerate(writes):
+            try:
+                ticket = journal.put(user) if kind == "put" else journal.delete(user.id)
+            except Exception:
+                for unlogged in reversed(writes[i:]):
+                    self._revert(unlogged)
+                self._rollback()
+                raise
+            if journal.sync:
+                self._undo.append((ticket, writes[i]))
+        return ticket
+
+    def _wait(self, ticket):
+        if ticket:
+            try:
+                self._journal.wait(ticket)
+            except Exception:
+                with self._lock:
+                    self._rollback()
+                raise
+
+    def _rollback(self):
+        """Undo, newest first, the writes the journal never made durable. Lock held."""
+        durable = self._journal.durable
+        while self._undo and self._undo[-1][0] > durable:
+            self._revert(self._undo.pop()[1])
+
+    def _revert(self, write):
+        """Undo one write from ``_log()``; every later write is undone already. Lock held."""
+        kind, user, other = write
+        if kind == "delete":
+            self._reinsert(user, other)
+        elif other is None:
+            self._delete(user.id)
+        else:
+            if user.email:
+                del self._by_email[user.email]
+            self._users[user.id] = other
+            if other.email:
+                self._by_email[other.email] = other.id
+
+    def _reinsert(self, user, seq):
+        """Put a deleted ``user`` back at its position ``seq``. Called with the lock held."""
+        self._users[user.id] = user
+        if user.email:
+            self._by_email[user.email] = user.id
+        self._seq_of[user.id] = seq
+        seqs, ids = self._order
+        i = bisect_left(seqs, seq)
+        if i < len(seqs) and seqs[i] == seq:
+            ids[i] = user.id  # Its tombstone is still there
+            self._tombstones -= 1
+        else:
+            # Compacted away: swap in new lists so readers never see the two out of step
+            self._order = (seqs[:i] + [seq] + seqs[i:], ids[:i] + [user.id] + ids[i:])
+
+    def _checkpoint(self):
+        """Start a new journal generation and return it with a copy of the users."""
+        with self._lock:
+            return self._journal.rotate(), tuple(self._users.values())
+
+    def _delete(self, user_id):
+        """Called with the lock held."""
+        user = self._users.pop(user_id, None)
+        if user is None:
+            return None
+        if user.email:
+            self._by_email.pop(user.email, None)
+        seqs, ids = self._order
+        ids[bisect_right(seqs, self._seq_of.pop(user_id)) - 1] = None
+        self._tombstones += 1
+        if self._tombstones > 1024 and self._tombstones * 2 > len(ids):
+            self._compact()
+        return user
+
+    def _compact(self):
+        """Drop deleted ids from the order. Called with the lock held."""
+        seqs, ids = self._order
+        live = [(seq, user_id) for seq, user_id in zip(seqs, ids) if user_id is not None]
+        self._order = ([seq for seq, _ in live], [user_id for _, user_id in live])
+        self._tombstones = 0
+
+    def page(self, after=0, limit=100):
+        """Up to ``limit`` users in insertion order that come after position ``after``.
+
+        Returns ``(users, last)``; pass ``last`` as ``after`` to continue. ``last`` is None
+        once the end is reached (a full page may still be followed by an empty one).
+        Positions stay valid across writes and compaction.
+        """
+        seqs, ids = self._order
+        users = []
+        last = None
+        i = bisect_right(seqs, after)
+        end = len(seqs)
+        while i < end and len(users) < limit:
+            user_id = ids[i]
+            seq = seqs[i]
+            i += 1
+            # The lists may be a pre-compaction copy, so also check the id is still live
+            # at this position rather than re-added elsewhere.
+            if user_id is None or self._seq_of.get(user_id) != seq:
+                continue
+            user = self._users.get(user_id)
+            if user is not None:
+                users.append(user)
+                last = seq
+        if len(users) < limit or i >= end:
+            last = None  # Reached the end of the order
+        return users, last
+
+    def iter_users(self, chunk=256):
+        """Yield every user in insertion order, ``chunk`` at a time from the store."""
+        after = 0
+        while True:
+            users, after = self.page(after, chunk)
+            yield from users
+            if after is None:
+                return
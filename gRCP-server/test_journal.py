@@ -0,0 +1,101 @@
+import errno
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import service_pb2
+from journal import Journal, JournalError
+from store import UserStore
+
+
+class FsyncFailureTest(unittest.TestCase):
+    """A failed fsync must fail the writers waiting on it and every later write, not hang them."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal = Journal(self.directory.name)
+        self.store = UserStore(self.journal)
+
+    def tearDown(self):
+        self.journal.close()
+        self.directory.cleanup()
+
+    def call(self, function, *args):
+        """Run ``function`` in a thread and return what it raised, failing if it blocks."""
+        raised = []
+
+        def run():
+            try:
+                function(*args)
+            except Exception as e:
+                raised.append(e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), "write blocked")
+        return raised[0] if raised else None
+
+    def test_failed_fsync_fails_waiting_and_later_writes(self):
+        self.assertIsNone(self.call(self.store.add, service_pb2.User(id="1", email="a@example.com")))
+
+        with mock.patch("journal.os.fsync", side_effect=OSError(errno.EIO, "injected")):
+            error = self.call(self.store.add, service_pb2.User(id="2", email="b@example.com"))
+        self.assertIsInstance(error, JournalError)
+
+        # fsync works again, but what the failed one covered is unknown: keep refusing
+        error = self.call(self.store.add, service_pb2.User(id="3", email="c@example.com"))
+        self.assertIsInstance(error, JournalError)
+        self.assertIsNone(self.call(self.journal.wait, 1))  # Already durable before the failure
+
+        # Neither failed write is in the store, so a retry is not told the email is taken
+        self.assertEqual(self.ids(), ["1"])
+        self.assertIsNone(self.store.get_by_email("b@example.com"))
+        self.assertIsInstance(self.call(self.store.delete, "1"), JournalError)
+        self.assertEqual(self.ids(), ["1"])
+        self.assertEqual(self.store.get_by_email("a@example.com").id, "1")
+
+    def test_failed_writes_are_undone(self):
+        for i, name in enumerate("abc", 1):
+            self.call(self.store.add, service_pb2.User(id=str(i), email=f"{name}@example.com"))
+
+        with mock.patch("journal.os.fsync", side_effect=OSError(errno.EIO, "injected")):
+            error = self.call(self.store.add_many, [
+                service_pb2.User(id="1", email="new@example.com"),  # Replaces user 1
+                service_pb2.User(id="4", email="d@example.com"),
+                service_pb2.User(id="4", email="e@example.com"),
+            ])
+        self.assertIsInstance(error, JournalError)
+        self.assertEqual(self.ids(), ["1", "2", "3"])
+        self.assertEqual(self.store.get("1").email, "a@example.com")
+        self.assertEqual(self.store.get_by_email("a@example.com").id, "1")
+        for email in ("new@example.com", "d@example.com", "e@example.com"):
+            self.assertIsNone(self.store.get_by_email(email))
+
+    def test_failed_deletes_are_undone(self):
+        for i, name in enumerate("abc", 1):
+            self.call(self.store.add, service_pb2.User(id=str(i), email=f"{name}@example.com"))
+
+        with mock.patch("journal.os.fsync", side_effect=OSError(errno.EIO, "injected")):
+            error = self.call(self.store.delete_many, ["3", "1"])
+        self.assertIsInstance(error, JournalError)
+        self.assertEqual(self.ids(), ["1", "2", "3"])
+        self.assertEqual(self.store.get_by_email("a@example.com").id, "1")
+        self.assertEqual(self.store.get_by_email("c@example.com").id, "3")
+
+    def ids(self):
+        return [user.id for user in self.store.iter_users()]
+
+    def test_restart_recovers_what_was_durable(self):
+        self.call(self.store.add, service_pb2.User(id="1", email="a@example.com"))
+        with mock.patch("journal.os.fsync", side_effect=OSError(errno.ENOSPC, "injected")):
+            self.call(self.store.add, service_pb2.User(id="2", email="b@example.com"))
+        self.journal.close()
+
+        self.journal = Journal(self.directory.name)
+        self.assertIn("1", UserStore(self.journal))
+
+
+if __name__ == "__main__":
+    unittest.main()